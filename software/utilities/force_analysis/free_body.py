@@ -1,4 +1,5 @@
 import numpy as np
+from functools import lru_cache
 
 class Haptick:
     TRIANGLE = np.linspace(0, 2.0 * np.pi, 3, endpoint = False)
@@ -12,41 +13,132 @@ class Haptick:
 
         self._init_trusses()
     
+    @property
+    def condition(self):
+        # Condition number of the Plucker matrix. Large values mean small
+        # errors in measured truss forces give large errors in the wrench.
+        return self._geometry.condition
+    
     def truss_force_components(self, applied_force, applied_torque):
         magnitudes = self.truss_force_magnitudes(applied_force, applied_torque)
         return self._unit_forces[..., np.newaxis] * magnitudes[np.newaxis, ...]
     
     def truss_force_magnitudes(self, applied_force, applied_torque):
-        return self._inverse_plucker @ -np.atleast_2d(np.hstack((applied_force, applied_torque))).T
+        # Returns (6, N) for N applied forces and torques.
+        wrenches = np.concatenate((np.atleast_2d(applied_force), np.atleast_2d(applied_torque)), axis=1)
+        return self.truss_forces(wrenches).T
     
     def applied(self, truss_force_magnitudes):
-        forces_torques = -(self._plucker @ np.atleast_2d(truss_force_magnitudes).T)
-        return forces_torques[:3, ...], forces_torques[3:, ...]
+        # Returns (3, N) forces and torques for (N, 6) truss force magnitudes.
+        forces_torques = self.wrench(np.atleast_2d(truss_force_magnitudes))
+        return forces_torques[:, :3].T, forces_torques[:, 3:].T
+    
+    def wrench(self, truss_force_magnitudes):
+        # The applied wrench (force then torque) for (6,) or (N, 6) truss force
+        # magnitudes, in the same layout.
+        return truss_force_magnitudes @ self._geometry.wrench_matrix
+    
+    def truss_forces(self, wrench):
+        # The inverse of wrench, for (6,) or (N, 6) wrenches in the same
+        # layout, from the Plucker matrix's LU factorization.
+        return self._geometry.truss_forces(np.asarray(wrench))
     
     def _init_trusses(self):
-        # Create truss vectors
-        top_angles = np.empty(6)
-        top_angles[::2] = self.TRIANGLE - 0.5 * self.top_separation / self.top_radius
-        top_angles[1::2] = self.TRIANGLE + 0.5 * self.top_separation / self.top_radius
-        bottom_angles = np.empty(6)
-        bottom_angles[::2] = self.TRIANGLE - np.deg2rad(60.0) - 0.5 * self.bottom_separation / self.bottom_radius
-        bottom_angles[1::2] = self.TRIANGLE - np.deg2rad(60.0) + 0.5 * self.bottom_separation / self.bottom_radius
-        top_joints = self._joint_positions(top_angles, self.top_radius, self.height)
-        bottom_joints = self._joint_positions(bottom_angles, self.bottom_radius, 0.0)
-        self.trusses = np.dstack((top_joints, np.roll(bottom_joints, -1, axis=1)))
-
-        # Calculate unit truss forces and Plucker coordinates
-        self._unit_forces = self.trusses[..., 0] - self.trusses[..., 1]
-        self._unit_forces /= np.linalg.norm(self._unit_forces, axis=0)
-        moments = np.cross(self.trusses[..., 0], self._unit_forces, axis=0)
-        self._plucker = np.vstack((self._unit_forces, moments))
-        self._inverse_plucker = np.linalg.inv(self._plucker)
-
-    @staticmethod
-    def _joint_positions(angles, radius, z):
-        return np.vstack((radius * np.cos(angles),
-                        radius * np.sin(angles),
-                        np.ones_like(angles) * z))
+        # Trusses are shared between instances with the same geometry, so
+        # they're read only.
+        self._geometry = _geometry(self.top_radius, self.top_separation, self.bottom_radius,
+                                   self.bottom_separation, self.height)
+        self.trusses = self._geometry.trusses
+        self._unit_forces = self._geometry.unit_forces
+        self._plucker = self._geometry.plucker
+
+
+class Geometry:
+    # Everything derived from the five geometry parameters. The LU
+    # factorization and condition number are only worked out when first
+    # needed, as most users only go from truss forces to the wrench.
+    __slots__ = ("trusses", "unit_forces", "plucker", "wrench_matrix", "_lu", "_pivots", "_getrs",
+                 "_force_matrix", "_condition")
+
+    # Batches of up to this many wrenches are solved with the LU factors.
+    # LAPACK's triangular solves are slow for six rows and many right hand
+    # sides, so bigger batches are multiplied by the inverse worked out from
+    # the same factors, which agrees to rounding for a matrix this small.
+    SOLVE_ROWS = 4
+
+    def __init__(self, trusses, unit_forces, plucker):
+        self.trusses = trusses
+        self.unit_forces = unit_forces
+        self.plucker = plucker
+        self.wrench_matrix = np.ascontiguousarray(-plucker.T)
+        for array in (trusses, unit_forces, plucker, self.wrench_matrix):
+            array.flags.writeable = False
+        self._lu = None
+        self._condition = None
+
+    @property
+    def condition(self):
+        if self._condition is None:
+            self._condition = np.linalg.cond(self.plucker)
+        return self._condition
+
+    def truss_forces(self, wrench):
+        if self._lu is None:
+            self._factorize()
+        if wrench.ndim == 1 or len(wrench) <= self.SOLVE_ROWS:
+            return self._getrs(self._lu, self._pivots, -wrench.T)[0].T
+        # Rows times the inverse of wrench_matrix, keeping the (N, 6) layout
+        return wrench @ self._force_matrix
+
+    def _factorize(self):
+        # LAPACK is called directly, as scipy's lu_solve overhead dominates
+        # for a 6x6 system. scipy is imported here to keep it out of code that
+        # only calls applied.
+        from scipy.linalg.lapack import dgetrf, dgetri, dgetrs
+        lu, pivots, _ = dgetrf(self.plucker)
+        diagonal = np.abs(lu.diagonal())
+        if diagonal.min() <= diagonal.max() * np.finfo(float).eps:
+            raise np.linalg.LinAlgError("Plucker matrix is singular for this geometry")
+        self._force_matrix = np.ascontiguousarray(-dgetri(lu, pivots)[0].T)
+        self._force_matrix.flags.writeable = False
+        self._getrs = dgetrs
+        self._lu, self._pivots = lu, pivots
+
+
+# Joints sit either side of each corner of a triangle, and each truss runs from
+# a top joint to the next bottom joint round.
+_SIDES = np.array([-0.5, 0.5])
+_NEXT = np.roll(np.arange(6), -1)
+
+
+@lru_cache(maxsize=128)
+def _geometry(top_radius, top_separation, bottom_radius, bottom_separation, height):
+    # This is the cost of every new geometry (each particle of the optimiser,
+    # say), so it's written out rather than built from stacks and np.cross.
+    top_angles = (Haptick.TRIANGLE[:, np.newaxis] + _SIDES * (top_separation / top_radius)).ravel()
+    bottom_angles = (Haptick.TRIANGLE[:, np.newaxis] - np.pi / 3.0
+                     + _SIDES * (bottom_separation / bottom_radius)).ravel()[_NEXT]
+
+    # Create truss vectors
+    trusses = np.empty((3, 6, 2))
+    trusses[0, :, 0] = top_radius * np.cos(top_angles)
+    trusses[1, :, 0] = top_radius * np.sin(top_angles)
+    trusses[2, :, 0] = height
+    trusses[0, :, 1] = bottom_radius * np.cos(bottom_angles)
+    trusses[1, :, 1] = bottom_radius * np.sin(bottom_angles)
+    trusses[2, :, 1] = 0.0
+
+    # Calculate unit truss forces and Plucker coordinates, the moments being
+    # the cross product of the top joints with the unit forces
+    plucker = np.empty((6, 6))
+    unit_forces = plucker[:3]
+    np.subtract(trusses[..., 0], trusses[..., 1], out=unit_forces)
+    unit_forces /= np.sqrt(np.einsum('ij,ij->j', unit_forces, unit_forces))
+    (x, y, z), (u, v, w) = trusses[..., 0], unit_forces
+    plucker[3] = y * w - z * v
+    plucker[4] = z * u - x * w
+    plucker[5] = x * v - y * u
+    return Geometry(trusses, unit_forces.copy(), plucker)
 
 if __name__ == "__main__":
     import matplotlib.pyplot as plt
@@ -0,0 +1,323 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+from recording import open_samples, PERIOD
+
+
+@dataclass(frozen=True)
+class AnalysisSettings:
+    # Samples handed to each worker. Rounded down to a multiple of
+    # ALLAN_BLOCK so Allan deviation blocks never straddle chunks. Each
+    # worker's peak memory is about 300 bytes per sample of chunk on top of
+    # 30MB or so, around 100MB at the default, and bigger chunks barely help
+    # throughput.
+    chunk: int = 1 << 18
+    # Welch PSD segment length in samples, Hann windowed with 50% overlap.
+    segment: int = 4096
+    # Window in seconds for windowed RMS and drift.
+    window: float = 10.0
+
+
+# Allan deviation is computed in the workers for cluster sizes up to (but not
+# including) ALLAN_BLOCK samples. For longer clusters the workers just return
+# ALLAN_BLOCK sample means, which are few enough to finish off in one place.
+ALLAN_BLOCK = 1 << 16
+
+
+# Everything a worker returns is a partial result that can be merged exactly
+# with its neighbours':
+#
+# - stats: count, mean and sum of squared deviations of valid (non-NaN) rows,
+#   merged with Chan's parallel update.
+# - windows: count, sum and sum of squares for each global window the chunk
+#   overlaps, added together where a window straddles chunks.
+# - psd: summed periodograms and segment count. Segments start on a global grid
+#   and belong to the chunk they start in, reading past its end if needed.
+# - allan: for each cluster size, summed squared differences of consecutive
+#   cluster means and their count, plus the first and last cluster mean so the
+#   difference across the chunk boundary can be added when merging.
+# - blocks: ALLAN_BLOCK sample means, for longer cluster sizes.
+def analyse_chunk(path, start, stop, settings):
+    data = open_samples(path)
+    block = np.asarray(data[start:stop], dtype=np.float64)
+    valid = ~np.isnan(block).any(axis=1)
+    values = block[valid]
+
+    count = len(values)
+    mean = values.mean(axis=0) if count else np.zeros(6)
+    stats = (count, mean, np.square(values - mean).sum(axis=0))
+
+    window = _window_length(settings)
+    indices = (np.arange(start, stop) // window)[valid]
+    first = start // window
+    length = (stop - 1) // window - first + 1
+    windows = (
+        np.bincount(indices - first, minlength=length),
+        np.stack([np.bincount(indices - first, values[:, c], length) for c in range(6)], axis=1),
+        np.stack([np.bincount(indices - first, np.square(values[:, c]), length) for c in range(6)], axis=1),
+    )
+
+    return {
+        'start': start,
+        'stats': stats,
+        'windows': (first, *windows),
+        'psd': _periodograms(data, start, stop, settings.segment),
+        'allan': _allan_partial(block),
+        'blocks': block[:len(block) // ALLAN_BLOCK * ALLAN_BLOCK].reshape(-1, ALLAN_BLOCK, 6).mean(axis=1),
+    }
+
+
+def _window_length(settings):
+    return max(int(round(settings.window / PERIOD)), 1)
+
+
+def _periodograms(data, start, stop, segment, batch=32):
+    step = segment // 2
+    first = -(-start // step) * step
+    last = min(stop, len(data) - segment + 1)
+    window = np.hanning(segment + 1)[:-1]
+    total = np.zeros((segment // 2 + 1, 6))
+    count = 0
+    for batch_start in range(first, last, step * batch):
+        batch_stop = min(batch_start + step * batch, last)
+        starts = np.arange(batch_start, batch_stop, step)
+        samples = np.asarray(data[starts[0]:starts[-1] + segment], dtype=np.float64)
+        segments = np.lib.stride_tricks.sliding_window_view(samples, segment, axis=0)[::step]
+        segments = segments[~np.isnan(segments).any(axis=(1, 2))]
+        segments = segments - segments.mean(axis=2, keepdims=True)
+        spectra = np.abs(np.fft.rfft(segments * window, axis=2)) ** 2
+        total += spectra.sum(axis=0).T
+        count += len(segments)
+    return total, count
+
+
+def _allan_partial(block):
+    # Level k holds means of clusters of 2**k samples. NaN clusters (before
+    # the bias is known) give NaN differences, which are left out.
+    levels = []
+    means = block
+    while len(means) and len(levels) < ALLAN_BLOCK.bit_length() - 1:
+        differences = np.diff(means, axis=0)
+        finite = np.isfinite(differences)
+        levels.append((
+            np.square(np.where(finite, differences, 0.0)).sum(axis=0),
+            finite.sum(axis=0),
+            means[0],
+            means[-1],
+        ))
+        pairs = len(means) // 2 * 2
+        means = (means[0:pairs:2] + means[1:pairs:2]) / 2
+    return levels
+
+
+def merge(results, samples, settings):
+    # Combines chunk results, which must be in order, into whole-recording
+    # statistics.
+    window = _window_length(settings)
+    windows = -(-samples // window)
+    window_count = np.zeros(windows)
+    window_sum = np.zeros((windows, 6))
+    window_squares = np.zeros((windows, 6))
+
+    count, mean, squares = 0, np.zeros(6), np.zeros(6)
+    psd, segments = 0.0, 0
+    allan = None
+    blocks = []
+
+    for result in results:
+        other_count, other_mean, other_squares = result['stats']
+        if other_count:
+            total = count + other_count
+            delta = other_mean - mean
+            mean = mean + delta * other_count / total
+            squares = squares + other_squares + delta ** 2 * count * other_count / total
+            count = total
+
+        first, c, s, q = result['windows']
+        window_count[first:first + len(c)] += c
+        window_sum[first:first + len(c)] += s
+        window_squares[first:first + len(c)] += q
+
+        psd = psd + result['psd'][0]
+        segments += result['psd'][1]
+
+        if allan is None:
+            allan = [[total, n, last] for total, n, _, last in result['allan']]
+        else:
+            for level, (total, n, start, last) in zip(allan, result['allan']):
+                difference = start - level[2]
+                finite = np.isfinite(difference)
+                level[0] = level[0] + total + np.where(finite, difference, 0.0) ** 2
+                level[1] = level[1] + n + finite
+                level[2] = last
+        blocks.append(result['blocks'])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        window_mean = window_sum / window_count[:, np.newaxis]
+        window_rms = np.sqrt(np.maximum(window_squares / window_count[:, np.newaxis] - window_mean ** 2, 0.0))
+
+    taus, deviations = [], []
+    for k, (total, n, _) in enumerate(allan or []):
+        taus.append(2 ** k * PERIOD)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            deviations.append(np.sqrt(total / (2 * n)))
+    blocks = np.concatenate(blocks) if blocks else np.zeros((0, 6))
+    size = ALLAN_BLOCK
+    while len(blocks) >= 2:
+        differences = np.diff(blocks, axis=0)
+        finite = np.isfinite(differences)
+        taus.append(size * PERIOD)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            deviations.append(np.sqrt(np.square(np.where(finite, differences, 0.0)).sum(axis=0) / (2 * finite.sum(axis=0))))
+        pairs = len(blocks) // 2 * 2
+        blocks = (blocks[0:pairs:2] + blocks[1:pairs:2]) / 2
+        size *= 2
+
+    # One-sided power spectral density, scaled as scipy.signal.welch does.
+    frequencies = np.fft.rfftfreq(settings.segment, PERIOD)
+    window_power = np.square(np.hanning(settings.segment + 1)[:-1]).sum()
+    density = psd / max(segments, 1) / (window_power / PERIOD)
+    density[1:-1 if settings.segment % 2 == 0 else None] *= 2
+
+    return {
+        'samples': samples,
+        'valid_samples': count,
+        'mean': mean,
+        'rms': np.sqrt(squares / count) if count else np.full(6, np.nan),
+        'window_times': (np.arange(windows) + 0.5) * window * PERIOD,
+        'window_mean': window_mean,
+        'window_rms': window_rms,
+        'frequencies': frequencies,
+        'psd': density if segments else np.full_like(density, np.nan),
+        'psd_segments': segments,
+        'taus': np.array(taus),
+        'allan_deviation': np.array(deviations).reshape(-1, 6),
+    }
+
+
+def analyse(path, settings=AnalysisSettings(), workers=None, progress=None):
+    # Whole-recording analysis, spread over a pool of worker processes. Only a
+    # few chunks are in flight at once, so memory use doesn't grow with the
+    # length of the recording.
+    samples = len(open_samples(path))
+    chunk = max(settings.chunk // ALLAN_BLOCK, 1) * ALLAN_BLOCK
+    starts = range(0, samples, chunk)
+    workers = workers or os.cpu_count()
+
+    def results(pool):
+        pending = []
+        for start in starts:
+            pending.append(pool.submit(analyse_chunk, path, start, min(start + chunk, samples), settings))
+            if len(pending) > 2 * workers:
+                yield pending.pop(0).result()
+                if progress:
+                    progress(min(start, samples), samples)
+        for future in pending:
+            yield future.result()
+        if progress:
+            progress(samples, samples)
+
+    with ProcessPoolExecutor(workers) as pool:
+        return merge(results(pool), samples, settings)
+
+
+def summary(results):
+    # Per-channel figures for the report. Drift is the least squares slope of
+    # the window means, and noise density is the median PSD between 1 and
+    # 100Hz.
+    times = results['window_times'] / 3600
+    channels = []
+    for c in range(6):
+        means = results['window_mean'][:, c]
+        finite = np.isfinite(means)
+        slope = np.polyfit(times[finite], means[finite], 1)[0] if finite.sum() >= 2 else np.nan
+        band = (results['frequencies'] >= 1) & (results['frequencies'] <= 100)
+        deviations = results['allan_deviation'][:, c]
+        best = np.nanargmin(deviations) if np.any(np.isfinite(deviations)) else None
+        channels.append({
+            'mean': results['mean'][c],
+            'rms': results['rms'][c],
+            'window_rms_median': np.nanmedian(results['window_rms'][:, c]) if finite.any() else np.nan,
+            'window_rms_max': np.nanmax(results['window_rms'][:, c]) if finite.any() else np.nan,
+            'drift_per_hour': slope,
+            'drift_peak_to_peak': np.ptp(means[finite]) if finite.any() else np.nan,
+            'noise_density': np.sqrt(np.median(results['psd'][band, c])),
+            'allan_minimum': deviations[best] if best is not None else np.nan,
+            'allan_minimum_tau': results['taus'][best] if best is not None else np.nan,
+        })
+    return {
+        'samples': results['samples'],
+        'valid_samples': results['valid_samples'],
+        'duration': results['samples'] * PERIOD,
+        'psd_segments': results['psd_segments'],
+        'channels': [{name: float(value) for name, value in channel.items()} for channel in channels],
+    }
+
+
+def write_report(results, output):
+    output.mkdir(parents=True, exist_ok=True)
+    with open(output / "report.json", 'w') as file:
+        json.dump(summary(results), file, indent=2)
+    np.savez_compressed(output / "curves.npz", **{name: value for name, value in results.items()
+                                                  if isinstance(value, np.ndarray)})
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    labels = [f"Channel {c}" for c in range(6)]
+    fig, ax = plt.subplots()
+    ax.loglog(results['frequencies'][1:], np.sqrt(results['psd'][1:]), label=labels)
+    ax.set(xlabel="Frequency (Hz)", ylabel="Noise density (V/√Hz)", title="Power spectral density")
+    ax.legend()
+    ax.grid(True, which='both', alpha=0.3)
+    fig.savefig(output / "psd.png", dpi=150)
+
+    fig, ax = plt.subplots()
+    ax.loglog(results['taus'], results['allan_deviation'], label=labels)
+    ax.set(xlabel="Cluster time (s)", ylabel="Allan deviation (V)", title="Allan deviation")
+    ax.legend()
+    ax.grid(True, which='both', alpha=0.3)
+    fig.savefig(output / "allan.png", dpi=150)
+
+    fig, (top, bottom) = plt.subplots(2, sharex=True)
+    top.plot(results['window_times'], results['window_mean'], label=labels)
+    top.set(ylabel="Mean (V)", title="Drift")
+    top.legend(fontsize='small')
+    bottom.plot(results['window_times'], results['window_rms'])
+    bottom.set(xlabel="Time (s)", ylabel="RMS (V)")
+    fig.savefig(output / "drift.png", dpi=150)
+    plt.close('all')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Characterise sensor noise from a recording of any length.")
+    parser.add_argument("recording", help="CSV or raw float32 recording from the monitor")
+    parser.add_argument("--output", type=Path, default=None, help="report directory (default: <recording>.analysis)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk", type=int, default=AnalysisSettings.chunk, help="samples per work item, ~300 bytes of worker memory each")
+    parser.add_argument("--segment", type=int, default=AnalysisSettings.segment, help="PSD segment length in samples")
+    parser.add_argument("--window", type=float, default=AnalysisSettings.window, help="seconds per RMS and drift window")
+    args = parser.parse_args()
+
+    def progress(done, total):
+        print(f"\r{done / total:6.1%}", end="", file=sys.stderr, flush=True)
+
+    settings = AnalysisSettings(args.chunk, args.segment, args.window)
+    start = time.perf_counter()
+    results = analyse(args.recording, settings, args.workers, progress)
+    print(f"\ranalysed {results['samples'] * PERIOD:.0f}s of data in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    output = args.output or Path(args.recording + ".analysis")
+    write_report(results, output)
+    for c, channel in enumerate(summary(results)['channels']):
+        print(f"channel {c}: rms {channel['rms'] * 1e9:.1f}nV, "
+              f"density {channel['noise_density'] * 1e9:.2f}nV/√Hz, "
+              f"drift {channel['drift_per_hour'] * 1e9:.1f}nV/h, "
+              f"allan min {channel['allan_minimum'] * 1e9:.2f}nV at {channel['allan_minimum_tau']:.2g}s")
@@ -0,0 +1,63 @@
+import argparse
+import multiprocessing
+import time
+import numpy as np
+import interface
+from simulator import Simulator
+
+
+def run(backend, speed, duration, dtype):
+    with Simulator(offsets=[1000] * 6, speed=speed) as sim:
+        haptick = interface.Haptick(dtype=dtype, backend=backend)
+
+        # Startup is measured from connect until the first block arrives. The
+        # first blocks are NaN until the bias is known, but they still show the
+        # acquisition loop is running.
+        start = time.perf_counter()
+        haptick.connect(sim.port)
+        while haptick.get_vals() is None:
+            time.sleep(0.001)
+        startup = time.perf_counter() - start
+
+        # Poll like the monitor does, timing how long the consumer spends
+        # receiving data.
+        received = 0
+        receive_time = 0.0
+        start = time.perf_counter()
+        written = sim.frames_written
+        while time.perf_counter() - start < duration:
+            tic = time.perf_counter()
+            vals = haptick.get_vals()
+            receive_time += time.perf_counter() - tic
+            if vals is not None:
+                received += len(vals)
+            time.sleep(0.02)
+        elapsed = time.perf_counter() - start
+        written = sim.frames_written - written
+        haptick.disconnect()
+
+    return {
+        "startup": startup,
+        "rate": received / elapsed,
+        "offered": written / elapsed,
+        "receive": receive_time / elapsed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the process and thread acquisition backends against the simulator.")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to measure at each speed")
+    parser.add_argument("--speeds", type=float, nargs="+", default=[1.0, 4.0, 16.0], help="simulator speeds relative to the real device")
+    parser.add_argument("--dtype", default="float64", choices=["float64", "float32", "int32"])
+    parser.add_argument("--start-method", default=None, choices=multiprocessing.get_all_start_methods())
+    args = parser.parse_args()
+
+    if args.start_method:
+        multiprocessing.set_start_method(args.start_method)
+
+    print(f"{'backend':>8} {'speed':>6} {'startup':>9} {'offered':>10} {'delivered':>10} {'consumer':>9}")
+    for speed in args.speeds:
+        for backend in interface.Haptick.BACKENDS:
+            result = run(backend, speed, args.duration, np.dtype(args.dtype))
+            print(f"{backend:>8} {speed:>6.1f} {result['startup'] * 1e3:>7.1f}ms "
+                  f"{result['offered']:>8.0f}/s {result['rate']:>8.0f}/s {result['receive'] * 100:>8.2f}%")
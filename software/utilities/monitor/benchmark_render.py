@@ -0,0 +1,66 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+import numpy as np
+
+# The plots are drawn into an offscreen framebuffer from a headless EGL context,
+# so this runs without a display, e.g. on Mesa's llvmpipe software renderer.
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtWidgets import QApplication
+import moderngl
+from visualisers import GlChannelVoltage, GlChannelPsd
+
+
+def measure(plot_type, ctx, size, frames, rate):
+    # Returns the time for each frame of a full history plot, fed a refresh
+    # interval's worth of new samples before every frame. Each frame is timed
+    # until the GPU has finished it, not just until it's been submitted.
+    plot = plot_type()
+    plot.resize(*size)
+    plot.init(ctx)
+    fbo = ctx.simple_framebuffer(size, samples=plot.SAMPLES)
+    rng = np.random.default_rng(0)
+
+    history = GlChannelVoltage.BUCKETS * GlChannelVoltage.BUCKET
+    plot.add_values(rng.normal(0.0, 1e-6, (history, 6)).astype(np.float32))
+    plot.draw(fbo)
+    ctx.finish()
+
+    per_frame = int(round(1.0 / (rate * 256e-6)))
+    times = []
+    for _ in range(frames):
+        values = rng.normal(0.0, 1e-6, (per_frame, 6)).astype(np.float32)
+        start = time.perf_counter()
+        plot.add_values(values)
+        plot.draw(fbo)
+        ctx.finish()
+        times.append(time.perf_counter() - start)
+    fbo.release()
+    return times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how long the OpenGL plots take to draw a frame.")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--size", type=int, nargs=2, default=(1200, 400), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--rate", type=float, default=60.0, help="display refresh rate the data arrives at")
+    parser.add_argument("--backend", default="egl", help="moderngl standalone backend")
+    parser.add_argument("--budget", type=float, default=20e-3, help="fail if any plot's 95th percentile exceeds this")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    ctx = moderngl.create_standalone_context(backend=args.backend, require=330)
+    print(f"renderer {ctx.info['GL_RENDERER']}, {ctx.info['GL_VERSION']}")
+
+    failed = False
+    for plot_type in (GlChannelVoltage, GlChannelPsd):
+        times = sorted(measure(plot_type, ctx, tuple(args.size), args.frames, args.rate))
+        p95 = times[int(0.95 * (len(times) - 1))]
+        print(f"{plot_type.__name__}: median {statistics.median(times) * 1e3:.2f}ms, "
+              f"95% {p95 * 1e3:.2f}ms, max {times[-1] * 1e3:.2f}ms")
+        if p95 > args.budget:
+            print(f"    over the {args.budget * 1e3:.0f}ms budget")
+            failed = True
+    sys.exit(1 if failed else 0)
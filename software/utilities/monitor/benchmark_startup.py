@@ -0,0 +1,32 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+def measure():
+    # Returns the time main.py reports for getting its window up, and the
+    # wall clock time for the whole process including interpreter startup.
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "main.py", "--startup-time"], cwd=Path(__file__).parent,
+                            capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    return float(result.stdout.strip().splitlines()[-1]), wall
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how long the monitor takes to show its window.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="fail if the median time to window exceeds this many seconds")
+    args = parser.parse_args()
+
+    results = [measure() for _ in range(args.runs)]
+    window = statistics.median(r[0] for r in results)
+    wall = statistics.median(r[1] for r in results)
+    print(f"median time to window {window * 1e3:.0f}ms, process wall time {wall * 1e3:.0f}ms")
+
+    if window > args.budget:
+        print(f"over the {args.budget * 1e3:.0f}ms budget")
+        sys.exit(1)
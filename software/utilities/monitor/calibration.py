@@ -0,0 +1,277 @@
+import argparse
+import json
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+from recording import open_samples, PERIOD
+
+# Hackish way of importing my free body code without releasing a package
+import sys
+sys.path.append(str(Path(__file__).parent.resolve() / "../force_analysis/"))
+import free_body
+
+# Calibrations are kept per device, named by Haptick.device_id.
+CALIBRATION_DIR = Path(__file__).parent / "calibrations"
+
+# Geometry of the prototype, used for the ideal calibration.
+SEPARATION = 2 * np.pi * 25e-3 * 25.0 / 360.0
+GEOMETRY = (25e-3, SEPARATION, 25e-3, SEPARATION, 20e-3)
+
+
+@dataclass(frozen=True, eq=False)
+class Calibration:
+    # Maps the six channel voltages to the wrench applied to the platform,
+    # wrench = matrix @ voltages, where the wrench is force then torque in
+    # Haptick space.
+    matrix: np.ndarray
+    device: str = "ideal"
+    # Condition number of the fitted data, i.e. how well the calibration loads
+    # covered all six degrees of freedom, and the RMS fit residual of each
+    # wrench component.
+    condition: float = None
+    residual_rms: np.ndarray = field(default=None)
+    samples: int = 0
+
+    @classmethod
+    def ideal(cls):
+        # The free body model in volt-equivalent units. The arm forces are the
+        # negated voltages, rolled by one so base arm index 0 and 1 are
+        # immediately either side of the positive x-axis and indices increase
+        # with increasing geometric angle.
+        plucker = free_body.Haptick(*GEOMETRY)._plucker
+        return cls(np.roll(plucker, -1, axis=1))
+
+    @classmethod
+    def for_device(cls, device):
+        path = CALIBRATION_DIR / f"{device}.json"
+        return cls.load(path) if path.exists() else cls.ideal()
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            contents = json.load(file)
+        return cls(
+            matrix=np.array(contents['matrix']),
+            device=contents['device'],
+            condition=contents.get('condition'),
+            residual_rms=np.array(contents['residual_rms']) if contents.get('residual_rms') else None,
+            samples=contents.get('samples', 0),
+        )
+
+    def save(self, path=None):
+        path = Path(path or CALIBRATION_DIR / f"{self.device}.json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump({
+                'device': self.device,
+                'created': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                'matrix': self.matrix.tolist(),
+                'condition': self.condition,
+                'residual_rms': None if self.residual_rms is None else self.residual_rms.tolist(),
+                'samples': self.samples,
+            }, file, indent=2)
+        return path
+
+    def wrench(self, voltages):
+        # Works on a single (6,) sample or (samples, 6) blocks.
+        return voltages @ self.matrix.T
+
+    @property
+    def scale(self):
+        # Ratio of the ideal model's magnitude to this calibration's. Scaling
+        # wrenches by it lets sensitivities tuned against the ideal model's
+        # volt-equivalent units work whichever calibration is in use.
+        return _ideal_norm() / np.linalg.norm(self.matrix)
+
+
+@lru_cache(maxsize=None)
+def _ideal_norm():
+    return np.linalg.norm(Calibration.ideal().matrix)
+
+
+class RlsCalibrator:
+    # Recursive least squares fit of the calibration matrix, updated a block
+    # of samples at a time in constant memory. Each block moves the estimate
+    # by the gain times the block's prediction error:
+    #
+    #   R = forgetting**n R + X' W X
+    #   theta += R^-1 X' W (Y - X theta)
+    #
+    # where X holds the block's voltages, Y the known wrenches and W weights
+    # older samples in the block by the forgetting factor. With forgetting=1
+    # this gives exactly the batch least squares solution. Until the loads
+    # have excited all six degrees of freedom R is singular, and the minimum
+    # norm solution is used.
+    def __init__(self, forgetting=1.0):
+        self.forgetting = forgetting
+        self.information = np.zeros((6, 6))
+        self.theta = np.zeros((6, 6))
+        self.samples = 0
+        self._error_squares = np.zeros(6)
+        self._error_weight = 0.0
+
+    def update(self, voltages, wrenches):
+        voltages = np.asarray(voltages, dtype=np.float64)
+        wrenches = np.broadcast_to(np.asarray(wrenches, dtype=np.float64), voltages.shape)
+        valid = ~np.isnan(voltages).any(axis=1)
+        voltages, wrenches = voltages[valid], wrenches[valid]
+        count = len(voltages)
+        if count == 0:
+            return
+
+        weights = self.forgetting ** np.arange(count - 1, -1, -1)
+        decay = self.forgetting ** count
+        errors = wrenches - voltages @ self.theta
+        weighted = voltages.T * weights
+
+        self.information = decay * self.information + weighted @ voltages
+        self.theta += np.linalg.lstsq(self.information, weighted @ errors, rcond=None)[0]
+        self.samples += count
+
+        # Prediction errors (before this block's update) track how well the
+        # fit is doing as data arrives.
+        self._error_squares = decay * self._error_squares + weights @ np.square(errors)
+        self._error_weight = decay * self._error_weight + weights.sum()
+
+    @property
+    def condition(self):
+        # Condition number of the voltages seen so far, as a design matrix.
+        return float(np.sqrt(np.linalg.cond(self.information)))
+
+    @property
+    def prediction_rms(self):
+        return np.sqrt(self._error_squares / max(self._error_weight, 1.0))
+
+    def calibration(self, device, residual_rms=None):
+        return Calibration(self.theta.T.copy(), device, self.condition, residual_rms, self.samples)
+
+
+def read_loads(path):
+    # Known loads, one per line: start and stop time in seconds within the
+    # recording, then force (N) and torque (Nm) in Haptick space. Only the
+    # steady part of each load should be covered.
+    loads = np.loadtxt(path, delimiter=',', comments='#', ndmin=2)
+    if loads.shape[1] != 8:
+        raise ValueError(f"{path} should have 8 columns: start, stop, fx, fy, fz, tx, ty, tz")
+    return loads
+
+
+def fit_recording(recording, loads, device, forgetting=1.0, block=1 << 16):
+    # Fits a calibration from the loaded intervals of a recording, then makes
+    # a second pass to get the residual of each load under the final fit.
+    #
+    # The recording must be made with bias correction off. Otherwise any load
+    # held for the correction time is zeroed, and the fit would regress the
+    # loads against nothing. Loads that look zeroed, with every channel's mean
+    # within its noise, are refused.
+    data = open_samples(recording)
+    calibrator = RlsCalibrator(forgetting)
+    for i, (start, stop, wrench) in enumerate(_intervals(data, loads)):
+        sums, squares, count = np.zeros(6), np.zeros(6), 0
+        for block_start in range(start, stop, block):
+            voltages = np.asarray(data[block_start:min(block_start + block, stop)], dtype=np.float64)
+            voltages = voltages[~np.isnan(voltages).any(axis=1)]
+            calibrator.update(voltages, wrench)
+            sums += voltages.sum(axis=0)
+            squares += np.square(voltages).sum(axis=0)
+            count += len(voltages)
+        if count and np.any(wrench):
+            mean = sums / count
+            deviation = np.sqrt(np.maximum(squares / count - mean ** 2, 0.0))
+            if np.all(np.abs(mean) < deviation):
+                raise ValueError(f"load {i} at {start * PERIOD:.1f}s reads as zero, "
+                                 "was the recording made with bias correction on?")
+
+    calibration = calibrator.calibration(device)
+    squares, count = np.zeros(6), 0
+    per_load = []
+    for start, stop, wrench in _intervals(data, loads):
+        load_squares, load_count = np.zeros(6), 0
+        for block_start in range(start, stop, block):
+            voltages = np.asarray(data[block_start:min(block_start + block, stop)], dtype=np.float64)
+            voltages = voltages[~np.isnan(voltages).any(axis=1)]
+            load_squares += np.square(calibration.wrench(voltages) - wrench).sum(axis=0)
+            load_count += len(voltages)
+        per_load.append(np.sqrt(load_squares / max(load_count, 1)))
+        squares += load_squares
+        count += load_count
+
+    residual_rms = np.sqrt(squares / max(count, 1))
+    calibration = calibrator.calibration(device, residual_rms)
+    return calibration, per_load
+
+
+def _intervals(data, loads):
+    for start, stop, *wrench in loads:
+        start = max(int(round(start / PERIOD)), 0)
+        stop = min(int(round(stop / PERIOD)), len(data))
+        if stop > start:
+            yield start, stop, np.array(wrench)
+
+
+def fit_live(haptick, port, wrenches, duration, device, forgetting=1.0):
+    # Prompts for each known load in turn and fits from live data. Bias
+    # correction is turned off, as a steady load would otherwise be corrected
+    # back to zero. The initial bias is still taken from the first few seconds
+    # after connecting, so the device must be left unloaded until it's known.
+    haptick.bias_correction = type(haptick.bias_correction)(enabled=False)
+    input("remove any load from the device and press enter")
+    haptick.connect(port)
+    calibrator = RlsCalibrator(forgetting)
+    try:
+        print("finding the bias, don't touch the device")
+        _wait_for_bias(haptick)
+        for i, wrench in enumerate(wrenches):
+            input(f"apply load {i} {wrench} and press enter")
+            haptick.get_vals()
+            start = time.perf_counter()
+            while time.perf_counter() - start < duration:
+                vals = haptick.get_vals()
+                if vals is not None:
+                    calibrator.update(haptick.to_volts(vals), wrench)
+                time.sleep(0.02)
+            print(f"  prediction rms {calibrator.prediction_rms}, condition {calibrator.condition:.3g}")
+    finally:
+        haptick.disconnect()
+    return calibrator.calibration(device, calibrator.prediction_rms)
+
+
+def _wait_for_bias(haptick, timeout=15.0):
+    # Values are NaN (or, as raw counts, held back) until the bias is known.
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if haptick.wait(0.1) and (vals := haptick.get_vals()) is not None and not np.isnan(vals[-1]).any():
+            return
+    raise RuntimeError(f"no bias from the device after {timeout:.0f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit a calibration matrix from recordings or live data under known loads.")
+    parser.add_argument("loads", help="CSV of known loads: start, stop, fx, fy, fz, tx, ty, tz (live: fx..tz only)")
+    parser.add_argument("--recording", help="recording to fit from, made with bias correction off")
+    parser.add_argument("--port", help="fit from a live device on this port instead")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to hold each load when live")
+    parser.add_argument("--device", help="device the calibration is for (default: from the port)")
+    parser.add_argument("--forgetting", type=float, default=1.0, help="RLS forgetting factor per sample")
+    parser.add_argument("--output", help="calibration file (default: calibrations/<device>.json)")
+    args = parser.parse_args()
+
+    if args.port:
+        import interface
+        haptick = interface.Haptick()
+        device = args.device or haptick.device_id(args.port)
+        wrenches = np.loadtxt(args.loads, delimiter=',', comments='#', ndmin=2)
+        calibration = fit_live(haptick, args.port, wrenches, args.duration, device, args.forgetting)
+    elif args.recording:
+        device = args.device or "default"
+        calibration, per_load = fit_recording(args.recording, read_loads(args.loads), device, args.forgetting)
+        for i, rms in enumerate(per_load):
+            print(f"load {i} residual rms {np.array2string(rms, precision=3)}")
+    else:
+        parser.error("one of --recording or --port is needed")
+
+    print(f"condition {calibration.condition:.3g} over {calibration.samples} samples")
+    print(f"residual rms {np.array2string(calibration.residual_rms, precision=3)}")
+    print(f"saved {calibration.save(args.output)}")
@@ -0,0 +1,415 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import interface
+from interface import BiasCorrectionSettings, SerialProcess
+from simulator import Simulator
+from calibration import Calibration, GEOMETRY, free_body
+
+# Regression checks for the numeric pipeline, meant to be run before and after
+# any change to decoding, filtering, bias estimation or the geometry. There's
+# no test suite, so this runs standalone and exits non-zero on failure.
+#
+# Golden outputs of the acquisition pipeline are kept in golden/, one file per
+# input byte stream. Synthetic streams are regenerated from fixed seeds; any
+# captured streams (golden/*.bin, see --capture) are checked too. Run with
+# --record to regenerate the golden outputs after an intended change.
+#
+# Alternate engines are compared with the golden outputs from the reference
+# (float64, 64 sample blocks) within these tolerances, in volts: relative to
+# the largest golden value, plus an absolute allowance. Decoding is the same
+# for every engine, so they're only run on the clean stream, unfiltered and
+# with the low cutoff that's hardest on precision.
+#
+#   engine      relative  absolute  why
+#   reference   1e-6      0         golden values are stored as float32
+#   float32     1e-4      1e-9      float32 filter state (float64 where the
+#                                   design needs it)
+#   int32       1e-6      GAIN      rounding to whole ADC counts
+#   block16     5e-3      0         the bias is (re)estimated at block
+#                                   boundaries, so offsets step at slightly
+#                                   different samples
+#
+# The leading NaN (or withheld) rows before the bias is known may differ by up
+# to a block.
+GOLDEN_DIR = Path(__file__).parent / "golden"
+
+GAIN = SerialProcess.GAIN
+CONFIGS = {
+    "unfiltered": None,
+    "10Hz": 10.0,
+    "100Hz": 100.0,
+}
+ENGINES = {
+    "reference": (dict(), 1e-6, 0.0),
+    "float32": (dict(dtype=np.float32), 1e-4, 1e-9),
+    "int32": (dict(dtype=np.int32), 1e-6, GAIN),
+    "block16": (dict(block_size=16), 5e-3, 0.0),
+}
+ENGINE_STREAMS = ("clean", )
+ENGINE_CONFIGS = ("unfiltered", "10Hz")
+
+# Nothing is delivered until the bias has been found from the first 15625
+# samples, so streams need a little more than that to check anything.
+BIAS_FRAMES = 15625
+FRAMES = 17000
+
+
+def clean_stream(seed, frames=FRAMES):
+    # Offsets and noise like a real device, with a few load steps after the
+    # bias has been found.
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(-50000, 50000, 6) + rng.normal(0.0, 300.0, (frames, 6))
+    for start in rng.integers(BIAS_FRAMES, frames - 400, 3):
+        counts[start:start + 300] += rng.normal(0.0, 20000.0, 6)
+    return Simulator.encode(np.rint(counts).astype(np.int64))
+
+
+def resync_stream(seed, frames=FRAMES, corruptions=40):
+    return corrupt(clean_stream(seed, frames), np.random.default_rng(seed + 1), corruptions)[0]
+
+
+def corrupt(data, rng, corruptions, first=1):
+    # Inserts garbage, drops bytes or breaks a status byte at random frames
+    # from first on. Garbage never contains 0x05, so can't be mistaken for a
+    # status. Returns the stream and the frames corrupted.
+    frames = len(data) // 24
+    sites = np.sort(rng.choice(np.arange(first, frames - 1), corruptions, replace=False))
+    pieces = []
+    previous = 0
+    for site in sites:
+        offset = site * 24
+        pieces.append(data[previous:offset])
+        frame = bytearray(data[offset:offset + 24])
+        kind = rng.integers(3)
+        if kind == 0:
+            garbage = rng.integers(0, 256, rng.integers(1, 30), dtype=np.uint8)
+            pieces.append(garbage[garbage != 0x05].tobytes() + frame)
+        elif kind == 1:
+            start = rng.integers(0, 24)
+            del frame[start:start + rng.integers(1, 24 - start + 1)]
+            pieces.append(bytes(frame))
+        else:
+            frame[0] = 0x04
+            pieces.append(bytes(frame))
+        previous = offset + 24
+    pieces.append(data[previous:])
+    return b"".join(pieces), sites
+
+
+def streams():
+    found = {
+        "clean": clean_stream(1),
+        "resync": resync_stream(2),
+    }
+    for path in sorted(GOLDEN_DIR.glob("*.bin")):
+        found[path.stem] = path.read_bytes()
+    return found
+
+
+class EndOfStream(Exception):
+    pass
+
+
+class ScriptedSerial:
+    # Stands in for a serial port, handing out a fixed byte stream exactly as
+    # it's asked for so runs never depend on timing. Reading once it's all
+    # gone raises EndOfStream, which ends the acquisition loop.
+    def __init__(self, data):
+        self._data = bytes(data)
+        self._position = 0
+
+    def read(self, size=1):
+        start = self._advance(self._position + size)
+        return self._data[start:self._position]
+
+    def read_until(self, expected=b"\n"):
+        found = self._data.find(expected, self._position)
+        start = self._advance(len(self._data) if found < 0 else found + len(expected))
+        return self._data[start:self._position]
+
+    def _advance(self, stop):
+        if self._position >= len(self._data):
+            raise EndOfStream
+        start, self._position = self._position, min(stop, len(self._data))
+        return start
+
+
+def run_pipeline(data, filter_cutoff=None, bias_correction=BiasCorrectionSettings(), dtype=np.float64, block_size=64):
+    # Pushes a byte stream through the real acquisition code and returns
+    # everything it delivers, in volts. The consumer's end of the pipe is
+    # unbounded, so every block is sent as soon as it's ready.
+    process = SerialProcess(None, filter_cutoff, bias_correction, dtype=dtype, block_size=block_size)
+    consumer, conn = interface.thread_pipe(maxsize=0)
+    try:
+        process.run(ScriptedSerial(data), conn)
+    except EndOfStream:
+        pass
+    values = []
+    while consumer.poll():
+        values.append(consumer.recv())
+    if not values:
+        return np.zeros((0, 6))
+    unit = GAIN if np.dtype(dtype).kind == 'i' else 1.0
+    return np.vstack(values).astype(np.float64) * unit
+
+
+def record():
+    GOLDEN_DIR.mkdir(exist_ok=True)
+    for name, data in streams().items():
+        arrays = {}
+        for config, cutoff in CONFIGS.items():
+            output = run_pipeline(data, cutoff)
+            nan_rows = int(np.isnan(output).any(axis=1).sum())
+            arrays[f"{config}_nan_rows"] = nan_rows
+            arrays[f"{config}_values"] = output[nan_rows:].astype(np.float32)
+        np.savez_compressed(GOLDEN_DIR / f"{name}.npz", **arrays)
+        print(f"recorded {name}")
+
+
+def check_golden(engines):
+    failures = []
+    for name, data in streams().items():
+        path = GOLDEN_DIR / f"{name}.npz"
+        if not path.exists():
+            failures.append(f"{name}: no golden output, run with --record")
+            continue
+        with np.load(path) as golden:
+            golden = dict(golden)
+        for config, cutoff in CONFIGS.items():
+            nan_rows = int(golden[f"{config}_nan_rows"])
+            expected = golden[f"{config}_values"].astype(np.float64)
+            for engine in engines:
+                if engine != "reference" and (name not in ENGINE_STREAMS or config not in ENGINE_CONFIGS):
+                    continue
+                kwargs, relative, absolute = ENGINES[engine]
+                problem = compare(run_pipeline(data, cutoff, **kwargs), nan_rows, expected,
+                                  relative * np.abs(expected).max() + absolute, kwargs.get('block_size', 64))
+                if problem:
+                    failures.append(f"{name} {config} {engine}: {problem}")
+    return failures
+
+
+def compare(output, nan_rows, expected, tolerance, block_size):
+    # Engines delivering raw counts hold rows back rather than sending NaN,
+    # which (with the same block size) shows up as a shorter output.
+    if len(output) < nan_rows + len(expected) and block_size == 64:
+        output = np.vstack((np.full((nan_rows + len(expected) - len(output), 6), np.nan), output))
+    output_nan_rows = int(np.isnan(output).any(axis=1).sum())
+    if abs(output_nan_rows - nan_rows) > max(block_size, 64):
+        return f"{output_nan_rows} rows before the bias, expected {nan_rows}"
+    start = max(output_nan_rows, nan_rows)
+    stop = min(len(output), nan_rows + len(expected))
+    if stop - start < 0.9 * len(expected):
+        return f"only {stop - start} of {len(expected)} rows delivered"
+    error = np.abs(output[start:stop] - expected[start - nan_rows:stop - nan_rows]).max()
+    if error > tolerance:
+        return f"error {error:.3g} V exceeds {tolerance:.3g} V"
+    return None
+
+
+def fuzz_stream(rng, frames, corruptions):
+    # Frames whose first channel counts up, so every delivered sample can be
+    # traced back to the frame it came from. 0x05 0x3f never appears outside a
+    # status, as the decoder relies on that to resync.
+    indices = np.arange(4 * frames)
+    encoded = Simulator.encode(np.column_stack((indices, np.zeros((len(indices), 5), dtype=np.int64))))
+    rows = np.frombuffer(encoded, np.uint8).reshape(-1, 24)[:, 3:9]
+    indices = indices[~_has_status(rows)][:frames]
+
+    counts = np.column_stack((indices, rng.integers(-2 ** 20, 2 ** 20, (frames, 5))))
+    while True:
+        rows = np.frombuffer(Simulator.encode(counts), np.uint8).reshape(-1, 24)[:, 3:21]
+        bad = _has_status(rows)
+        if not bad.any():
+            break
+        counts[bad, 1:] = rng.integers(-2 ** 20, 2 ** 20, (bad.sum(), 5))
+    data, sites = corrupt(Simulator.encode(counts), rng, corruptions, BIAS_FRAMES + 128)
+    return data, counts, sites
+
+
+def _has_status(rows):
+    return ((rows[:, :-1] == 0x05) & (rows[:, 1:] == 0x3f)).any(axis=1)
+
+
+def check_fuzz(seeds, frames=FRAMES + 1000, corruptions=100):
+    # Properties of decoding corrupted streams, with filtering and bias
+    # correction off so samples are just the frames less a constant bias:
+    #
+    # - samples come out in order, without repeats
+    # - frames are only lost around a corruption (to at most four frames)
+    # - a sample that doesn't match any frame only comes from a corrupted
+    #   frame. The CRC isn't checked, so a frame that loses bytes mid-data
+    #   can be read with the start of the next one.
+    #
+    # Corruptions are all after the bias has been found, where they can be
+    # seen.
+    return [failure for seed in range(seeds) for failure in _check_fuzz_seed(seed, frames, corruptions)]
+
+
+def _check_fuzz_seed(seed, frames, corruptions):
+    rng = np.random.default_rng(1000 + seed)
+    data, counts, sites = fuzz_stream(rng, frames, corruptions)
+    output = run_pipeline(data, None, BiasCorrectionSettings(enabled=False))
+    output = output[~np.isnan(output).any(axis=1)] / GAIN
+    if len(output) == 0:
+        return [f"seed {seed}: nothing delivered"]
+
+    matched, frame_indices = _trace(output, counts)
+    if matched.sum() < 0.9 * len(output):
+        return [f"seed {seed}: only {matched.sum()} of {len(output)} samples traced to frames"]
+
+    failures = []
+    traced = frame_indices[matched]
+    if np.any(np.diff(traced) <= 0):
+        failures.append(f"seed {seed}: samples out of order or repeated")
+
+    near = np.zeros(len(counts) + 8, dtype=bool)
+    for offset in range(-1, 4):
+        near[np.clip(sites + offset, 0, len(near) - 1)] = True
+    missing = np.setdiff1d(np.arange(traced[0], traced[-1]), traced)
+    if np.any(~near[missing]):
+        failures.append(f"seed {seed}: frames {missing[~near[missing]][:5]} lost away from any corruption")
+    unmatched = np.flatnonzero(~matched)
+    previous = np.maximum.accumulate(np.where(matched, frame_indices, -1))[unmatched]
+    if np.any(~near[np.clip(previous + 1, 0, len(near) - 1)]):
+        failures.append(f"seed {seed}: unexplained samples away from any corruption")
+    return failures
+
+
+def _trace(output, counts):
+    # Finds the frame each sample came from. The bias is constant, so once one
+    # sample is anchored to a frame the rest follow from the counting channel,
+    # and are confirmed against the other channels.
+    column = counts[:, 0]
+    for anchor in range(min(len(output) - 8, 64)):
+        differences = np.rint(output[anchor:anchor + 8, 0] - output[anchor, 0]).astype(np.int64)
+        targets = np.searchsorted(column, column[:, np.newaxis] + differences)
+        targets = np.minimum(targets, len(counts) - 1)
+        candidates = np.flatnonzero(np.all(column[targets] == column[:, np.newaxis] + differences, axis=1))
+        biases = counts[candidates] - output[anchor]
+        offsets = counts[targets[candidates]] - output[anchor:anchor + 8] - biases[:, np.newaxis]
+        for bias in biases[np.all(np.abs(offsets) < 1e-3, axis=(1, 2))][:1]:
+            indices = np.searchsorted(column, np.rint(output[:, 0] + bias[0]).astype(np.int64))
+            indices = np.minimum(indices, len(counts) - 1)
+            return np.all(np.abs(counts[indices] - output - bias) < 1e-3, axis=1), indices
+    return np.zeros(len(output), dtype=bool), np.zeros(len(output), dtype=np.int64)
+
+
+def check_geometry(seed=0, samples=1000):
+    # The free body model against the calibration's ideal matrix, and the
+    # round trip through the inverse, on random batches.
+    failures = []
+    rng = np.random.default_rng(seed)
+    haptick = free_body.Haptick(*GEOMETRY)
+    voltages = rng.normal(0.0, 1e-5, (samples, 6))
+    force, torque = haptick.applied(np.roll(-voltages, 1, axis=1))
+    wrench = Calibration.ideal().wrench(voltages)
+    if not np.allclose(np.vstack((force, torque)).T, wrench, rtol=1e-12, atol=0.0):
+        failures.append("ideal calibration disagrees with free_body.Haptick.applied")
+    magnitudes = haptick.truss_force_magnitudes(wrench[:, :3], wrench[:, 3:])
+    force, torque = haptick.applied(magnitudes.T)
+    if not np.allclose(np.vstack((force, torque)).T, wrench, rtol=1e-9, atol=1e-20):
+        failures.append("truss_force_magnitudes doesn't invert applied")
+
+    # Batched (N, 6) calls against one sample at a time.
+    batch = haptick.wrench(magnitudes.T)
+    single = np.array([np.concatenate(haptick.applied(row)).ravel() for row in magnitudes.T[:50]])
+    if not np.allclose(batch[:50], single, rtol=1e-12, atol=0.0):
+        failures.append("batched wrench disagrees with applied")
+    if not np.allclose(haptick.truss_forces(batch), magnitudes.T, rtol=1e-9, atol=1e-20):
+        failures.append("batched truss_forces disagrees with truss_force_magnitudes")
+    return failures
+
+
+def check_statistics(seed=0):
+    # Incremental statistics (the recording index and the chunked analysis)
+    # against direct calculation over the same samples.
+    from recording import Recording
+    import analyse
+    failures = []
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(0.0, 1e-6, (300_001, 6)).astype('<f4')
+    samples[:1000] = np.nan
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "recording.f32"
+        samples.tofile(path)
+        direct = samples.astype(np.float64)
+
+        recording = Recording(path)
+        for start, stop in rng.integers(0, len(samples), (20, 2)):
+            start, stop = sorted((int(start), int(stop)))
+            if stop - start < 1000:
+                continue
+            block = direct[start:stop]
+            valid = block[~np.isnan(block).any(axis=1)]
+            mean, std = recording.statistics(start, stop)
+            if len(valid) and not (np.allclose(mean, valid.mean(axis=0), rtol=1e-9, atol=1e-15)
+                                   and np.allclose(std, valid.std(axis=0), rtol=1e-6)):
+                failures.append(f"Recording.statistics({start}, {stop}) disagrees")
+            # Coarse envelopes come from whole index buckets, so may take in a
+            # little either side, but must always bound the samples.
+            minimum, maximum = recording.envelope(start, stop, 100)
+            if np.any(np.nanmin(minimum, axis=0) > np.nanmin(block, axis=0)) or \
+                    np.any(np.nanmax(maximum, axis=0) < np.nanmax(block, axis=0)):
+                failures.append(f"Recording.envelope({start}, {stop}) doesn't bound the samples")
+            minimum, maximum = recording.envelope(start, start + 1000, 10)
+            exact = direct[start:start + 1000].reshape(10, 100, 6)
+            if not (np.array_equal(minimum, np.nanmin(exact, axis=1), equal_nan=True)
+                    and np.array_equal(maximum, np.nanmax(exact, axis=1), equal_nan=True)):
+                failures.append(f"Recording.envelope({start}, {start + 1000}) disagrees with the samples")
+
+        whole = analyse.analyse(path, analyse.AnalysisSettings(chunk=1 << 22), workers=1)
+        chunked = analyse.analyse(path, analyse.AnalysisSettings(chunk=1 << 16), workers=2)
+        for name in ('rms', 'mean', 'psd', 'allan_deviation', 'window_mean', 'window_rms'):
+            if not np.allclose(whole[name], chunked[name], rtol=1e-9, equal_nan=True):
+                failures.append(f"analyse {name} depends on the chunk size")
+        if not np.allclose(whole['rms'], np.nanstd(direct[1000:], axis=0), rtol=1e-9):
+            failures.append("analyse rms disagrees with a direct calculation")
+    return failures
+
+
+def capture(port, seconds, name):
+    import serial
+    with serial.Serial(port, timeout=0.1) as s:
+        data = bytearray()
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            data += s.read(4096)
+    GOLDEN_DIR.mkdir(exist_ok=True)
+    (GOLDEN_DIR / f"{name}.bin").write_bytes(bytes(data))
+    print(f"captured {len(data)} bytes to {name}.bin, now run with --record")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the numeric pipeline against golden outputs and properties.")
+    parser.add_argument("--record", action="store_true", help="regenerate the golden outputs from the reference")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--fuzz-seeds", type=int, default=3)
+    parser.add_argument("--capture", metavar="PORT", help="capture a byte stream from a device for golden data")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--name", default="captured")
+    args = parser.parse_args()
+
+    if args.capture:
+        capture(args.capture, args.seconds, args.name)
+        sys.exit(0)
+    if args.record:
+        record()
+        sys.exit(0)
+
+    failed = False
+    for name, check in (("golden", lambda: check_golden(args.engines)),
+                        ("fuzz", lambda: check_fuzz(args.fuzz_seeds)),
+                        ("geometry", check_geometry),
+                        ("statistics", check_statistics)):
+        start = time.perf_counter()
+        failures = check()
+        print(f"{name:>10}: {'FAIL' if failures else 'ok'} ({time.perf_counter() - start:.1f}s)")
+        for failure in failures:
+            print(f"    {failure}")
+        failed = failed or bool(failures)
+    sys.exit(1 if failed else 0)
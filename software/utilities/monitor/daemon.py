@@ -0,0 +1,192 @@
+import argparse
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from select import select
+import numpy as np
+import interface
+from calibration import Calibration
+
+# Haptick space has x into the screen, y to the left and z up. spacenavd
+# clients expect x to the right, y up and z towards the user. Both are right
+# handed, so forces and torques map the same way.
+HAPTICK_TO_SPNAV = np.array([
+    [0.0, -1.0, 0.0],
+    [0.0, 0.0, 1.0],
+    [-1.0, 0.0, 0.0],
+])
+
+
+@dataclass(frozen=True)
+class DaemonSettings:
+    socket_path: str = "/var/run/spnav.sock"
+    # Deadband on the channel voltages, as used by the cube demo.
+    threshold: float = 1.0e-6
+    # Most events per second sent to each client.
+    max_rate: float = 250.0
+    # Event counts per unit of (ideal model scaled) force and torque. The
+    # defaults give spacenavd's usual full scale of about 350 for a firm push.
+    translation_sensitivity: float = 3.5e7
+    rotation_sensitivity: float = 1.75e9
+    full_scale: int = 512
+
+
+class SpnavServer:
+    # Serves motion events over a Unix domain socket using the original
+    # spacenavd protocol, as spoken by libspnav: every event is eight native
+    # int32s. Motion events are 0, x, y, z, rx, ry, rz, then the milliseconds
+    # since the previous event. Anything clients send is ignored.
+    MOTION = 0
+    EVENT = struct.Struct("=8i")
+
+    def __init__(self, settings=DaemonSettings()):
+        self.settings = settings
+        self.clients = []
+        self.events_sent = 0
+        self._listener = None
+        self._last_event = None
+        self._zero_sent = True
+
+    def open(self):
+        # A socket left behind by a daemon that died is removed, but not one
+        # something is still serving on, or anything that isn't a socket.
+        path = self.settings.socket_path
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(path)
+                except ConnectionRefusedError:
+                    os.unlink(path)
+                else:
+                    raise RuntimeError(f"something is already serving on {path}")
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.settings.socket_path)
+        self._listener.listen()
+        self._listener.setblocking(False)
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+        self.clients = []
+        if self._listener:
+            self._listener.close()
+            self._listener = None
+            os.unlink(self.settings.socket_path)
+
+    def service(self):
+        # Accept new clients and drop ones that have gone away, without
+        # waiting.
+        readable, _, _ = select([self._listener] + self.clients, [], [], 0.0)
+        for sock in readable:
+            if sock is self._listener:
+                client, _ = self._listener.accept()
+                client.setblocking(False)
+                self.clients.append(client)
+            else:
+                try:
+                    if not sock.recv(4096):
+                        self._drop(sock)
+                except OSError:
+                    self._drop(sock)
+
+    def motion(self, values, calibration):
+        # Sends an event for the latest sample in values, unless we're inside
+        # the deadband or over the rate limit. A single zero event is sent on
+        # entering the deadband so clients know motion has stopped.
+        value = values[-1]
+        if np.any(np.isnan(value)):
+            return
+        now = time.perf_counter()
+        if self._last_event is not None and now - self._last_event < 1.0 / self.settings.max_rate:
+            return
+
+        if np.all(np.abs(value) < self.settings.threshold):
+            if self._zero_sent:
+                return
+            motion = np.zeros(6, dtype=np.int32)
+            self._zero_sent = True
+        else:
+            wrench = calibration.wrench(value) * calibration.scale
+            motion = np.concatenate((
+                HAPTICK_TO_SPNAV @ wrench[:3] * self.settings.translation_sensitivity,
+                HAPTICK_TO_SPNAV @ wrench[3:] * self.settings.rotation_sensitivity,
+            ))
+            full_scale = self.settings.full_scale
+            motion = np.clip(np.rint(motion), -full_scale, full_scale).astype(np.int32)
+            self._zero_sent = False
+
+        period = 0 if self._last_event is None else int((now - self._last_event) * 1e3)
+        self._last_event = now
+        self._send(self.EVENT.pack(self.MOTION, *motion.tolist(), period))
+
+    def _send(self, event):
+        # A client that can't keep up loses events rather than holding up the
+        # others.
+        for client in list(self.clients):
+            try:
+                client.send(event)
+            except BlockingIOError:
+                pass
+            except OSError:
+                self._drop(client)
+        self.events_sent += 1
+
+    def _drop(self, client):
+        self.clients.remove(client)
+        client.close()
+
+
+def run(port, settings=DaemonSettings(), filter_cutoff=None, stop=None):
+    # Acquires from the device on port and serves events until stop (a
+    # threading.Event) is set or we're interrupted. Uses small blocks from the
+    # thread backend to keep latency down.
+    haptick = interface.Haptick(backend="thread", block_size=16)
+    haptick.filter_cutoff = filter_cutoff
+    calibration = Calibration.for_device(haptick.device_id(port))
+    server = SpnavServer(settings)
+    server.open()
+    haptick.connect(port)
+    try:
+        while stop is None or not stop.is_set():
+            if haptick.wait(0.05):
+                values = haptick.get_vals()
+                if values is not None:
+                    server.motion(values, calibration)
+            server.service()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        haptick.disconnect()
+        server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Haptick motion to spacenavd clients.")
+    parser.add_argument("port", nargs="?", help="serial port of the device")
+    parser.add_argument("--simulate", action="store_true", help="serve from a simulated device instead")
+    parser.add_argument("--socket", default=DaemonSettings.socket_path)
+    parser.add_argument("--threshold", type=float, default=DaemonSettings.threshold, help="deadband in volts")
+    parser.add_argument("--rate", type=float, default=DaemonSettings.max_rate, help="most events per second")
+    parser.add_argument("--translation-sensitivity", type=float, default=DaemonSettings.translation_sensitivity)
+    parser.add_argument("--rotation-sensitivity", type=float, default=DaemonSettings.rotation_sensitivity)
+    parser.add_argument("--filter-cutoff", type=float, default=None, help="low pass filter cutoff in Hz")
+    args = parser.parse_args()
+
+    # Clean up the socket when stopped by a service manager too.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    settings = DaemonSettings(args.socket, args.threshold, args.rate,
+                              args.translation_sensitivity, args.rotation_sensitivity)
+    if args.simulate:
+        from simulator import Simulator
+        with Simulator() as simulator:
+            run(simulator.port, settings, args.filter_cutoff)
+    elif args.port:
+        run(args.port, settings, args.filter_cutoff)
+    else:
+        parser.error("a port or --simulate is needed")
@@ -1,10 +1,16 @@
 import serial
 import serial.tools.list_ports
 from multiprocessing import Process, Pipe
+from threading import Thread
+from queue import Queue, Empty
 from select import select
+from collections import deque, OrderedDict
 import numpy as np
-import scipy.signal as ss
 from dataclasses import dataclass
+from lazy import lazy_import
+
+# Only the acquisition side filters, so the GUI process never pays for scipy.
+ss = lazy_import("scipy.signal")
 
 
 @dataclass(frozen=True)
@@ -14,51 +20,279 @@ class BiasCorrectionSettings:
     time: float = 1.0
 
 
+@dataclass(frozen=True)
+class FilterDesign:
+    kind: str = "butter"
+    order: int = 4
+    ripple: float = None
+    attenuation: float = None
+
+    # The parameters each kind of filter needs, as for scipy.signal.iirfilter.
+    # Designs are checked here so mistakes are raised to whoever made them,
+    # not inside the acquisition loop.
+    KINDS = {
+        "butter": (),
+        "bessel": (),
+        "cheby1": ("ripple", ),
+        "cheby2": ("attenuation", ),
+        "ellip": ("ripple", "attenuation"),
+    }
+
+    def __post_init__(self):
+        if self.kind not in self.KINDS:
+            raise ValueError(f"Unknown filter kind {self.kind!r}")
+        if int(self.order) != self.order or self.order < 1:
+            raise ValueError(f"Filter order must be a positive integer, not {self.order!r}")
+        for name in self.KINDS[self.kind]:
+            if getattr(self, name) is None or getattr(self, name) <= 0.0:
+                raise ValueError(f"A {self.kind} filter needs a positive {name}")
+
+
+@dataclass(frozen=True)
+class IdleGatingSettings:
+    enabled: bool = False
+    # Activity is any channel's mean over a block reaching the threshold, so
+    # sample noise alone doesn't count.
+    threshold: float = 1.0e-6
+    hold_time: float = 0.25
+    pre_trigger: float = 0.05
+    heartbeat: float = 0.1
+
+
+@dataclass(frozen=True)
+class IdleSummary:
+    count: int
+    mean: np.ndarray
+    rms: np.ndarray
+
+
+class ThreadConnection:
+    # Mirrors the parts of multiprocessing's Connection used by SerialProcess
+    # and Haptick, so acquisition can run in a thread without pickling.
+    def __init__(self, incoming, outgoing):
+        self._incoming = incoming
+        self._outgoing = outgoing
+        self._pending = deque()
+    
+    def poll(self, timeout=0.0):
+        # Waiting needs a get, so anything received is held for recv. As with
+        # multiprocessing, a timeout of None waits forever.
+        if not self._pending:
+            try:
+                self._pending.append(self._incoming.get(block=timeout != 0.0, timeout=timeout))
+            except Empty:
+                return False
+        return True
+    
+    def recv(self):
+        if self._pending:
+            return self._pending.popleft()
+        return self._incoming.get()
+    
+    def send(self, obj):
+        self._outgoing.put(obj)
+    
+    def full(self):
+        return self._outgoing.full()
+
+
+def thread_pipe(maxsize=16):
+    # Returns the consumer's end then the acquisition end. Only the data
+    # direction is bounded, so a consumer that falls behind is noticed without
+    # commands ever blocking the caller, even once acquisition has died.
+    data, commands = Queue(maxsize), Queue()
+    return ThreadConnection(data, commands), ThreadConnection(commands, data)
+
+
+class FilterBank:
+    # Low pass filters for all six channels. Designs are cached per cutoff,
+    # and changes are applied at most once per fade, cross-fading from the old
+    # filter to the new one so the output doesn't jump.
+    TOLERANCE = 1.0e-5
+    NYQUIST = 0.5 / 256e-6
+
+    @classmethod
+    def check_cutoff(cls, cutoff):
+        if cutoff is not None and not 0.0 < cutoff < cls.NYQUIST:
+            raise ValueError(f"Filter cutoff must be between 0 and {cls.NYQUIST}Hz, not {cutoff!r}")
+
+    def __init__(self, design=FilterDesign(), dtype=np.float64, fade_time=0.05, cache_size=32):
+        self.design = design
+        self.dtype = np.dtype(dtype)
+        self.fade_length = int(np.round(fade_time / 256e-6))
+        self.cache_size = cache_size
+
+        self._designs = OrderedDict()
+        self._cutoff = None
+        self._pending = None
+        self._current = (None, None)
+        self._previous = None
+        self._fade_position = 0
+        self._level = None
+
+    @property
+    def cutoff(self):
+        return self._cutoff
+
+    @cutoff.setter
+    def cutoff(self, value):
+        self._cutoff = value
+        self._pending = (self.design, value)
+
+    def redesign(self, design):
+        self.design = design
+        self._pending = (design, self._cutoff)
+
+    def __call__(self, samples):
+        starting = self._level is None
+        if starting:
+            self._level = samples[0]
+
+        # Only start a new transition once the last one has finished. Any
+        # changes made in the meantime collapse into the latest one.
+        if self._pending is not None and self._previous is None:
+            sos = self._coefficients(*self._pending)
+            state = None if sos is None else ss.sosfilt_zi(sos)[..., np.newaxis] * self._level
+            if starting:
+                # Nothing to fade from yet
+                self._current = (sos, state)
+            else:
+                self._previous = self._current
+                self._current = (sos, state)
+                self._fade_position = 0
+            self._pending = None
+
+        result, self._current = self._apply(self._current, samples)
+        if self._previous is not None:
+            previous, self._previous = self._apply(self._previous, samples)
+            weights = (self._fade_position + np.arange(1, len(samples) + 1)) / self.fade_length
+            weights = np.clip(weights, 0.0, 1.0)[:, np.newaxis]
+            result = previous + (result - previous) * weights
+            self._fade_position += len(samples)
+            if self._fade_position >= self.fade_length:
+                self._previous = None
+        
+        self._level = result[-1]
+        return result.astype(self.dtype, copy=False)
+
+    @staticmethod
+    def _apply(filter, samples):
+        sos, state = filter
+        if sos is None:
+            return samples, filter
+        result, state = ss.sosfilt(sos, samples.astype(sos.dtype, copy=False), axis=0, zi=state)
+        return result, (sos, state)
+
+    def _coefficients(self, design, cutoff):
+        if cutoff is None:
+            return None
+        key = (design, cutoff)
+        if key in self._designs:
+            self._designs.move_to_end(key)
+        else:
+            sos = ss.iirfilter(design.order, cutoff, rp=design.ripple, rs=design.attenuation,
+                               btype='lowpass', ftype=design.kind, output='sos', fs=1/256e-6)
+            self._designs[key] = sos.astype(self._precision(sos))
+            if len(self._designs) > self.cache_size:
+                self._designs.popitem(last=False)
+        return self._designs[key]
+
+    def _precision(self, sos):
+        # Low cutoff filters have poles very close to the unit circle and don't
+        # survive single precision. Compare step responses and fall back to
+        # double precision if the working dtype isn't accurate enough.
+        if self.dtype == np.float64:
+            return self.dtype
+        step = np.ones(8192)
+        reference = ss.sosfilt(sos, step)
+        response = ss.sosfilt(sos.astype(self.dtype), step.astype(self.dtype))
+        if np.max(np.abs(response - reference)) < self.TOLERANCE:
+            return self.dtype
+        return np.dtype(np.float64)
+
+
 class SerialProcess:
     GAIN = (2.4 / 64) / 2.0 ** 24
 
-    def __init__(self, port, filter_cutoff, bias_correction):
+    def __init__(self, port, filter_cutoff, bias_correction, idle_gating=IdleGatingSettings(), dtype=np.float64, filter_design=FilterDesign(), block_size=64):
         self.port = port
+
+        # Samples are filtered and sent in blocks. Smaller blocks cut latency
+        # at the cost of more overhead per sample.
+        self.block_size = block_size
+
+        # Data is delivered as volts in float64 or float32, or as raw ADC
+        # counts in int32. Raw counts are processed as float32 internally, which
+        # represents every 24-bit count exactly.
+        self.dtype = np.dtype(dtype)
+        if self.dtype.kind == 'i':
+            self._work_dtype = np.dtype(np.float32)
+            self._unit = self.GAIN
+        else:
+            self._work_dtype = self.dtype
+            self._unit = 1.0
         
         self._bias = None
         self._counter = 0
-        self._cache = np.zeros((15625, 6))
+        self._cache = np.zeros((15625, 6), dtype=self._work_dtype)
+        self._idle_summary = None
 
+        self._filter_bank = FilterBank(filter_design, self._work_dtype)
         self.filter_cutoff = filter_cutoff
         self.bias_correction = bias_correction
+        self.idle_gating = idle_gating
     
     def __call__(self, conn):
         with serial.Serial(self.port, timeout=0.1) as s:
-            self.__sync(s)
-            samples_to_filter = []
-            samples_to_send = []
-            while True:
-                # Handle incoming messages
-                if conn.poll():
-                    message = conn.recv()
-                    if message["command"] == "close":
-                        return
-                    elif message["command"] == "set_filter_cutoff":
-                        self.filter_cutoff = message["value"]
-                    elif message["command"] == "set_bias_correction":
-                        self.bias_correction = message["value"]
-                
-                # Read, parse and (sometimes) filter data
-                data = s.read(24)
-                if parsed := self.__parse(data):
-                    samples_to_filter.append(parsed)
-                    if len(samples_to_filter) == 64:
-                        samples_to_send.append(self.__filter(samples_to_filter))
-                        samples_to_filter = []
-                else:
-                    self.__sync(s)
-                
-                # Send data
-                if samples_to_send and not self.__pipe_full(conn):
+            self.run(s, conn)
+    
+    def run(self, s, conn):
+        # Acquires from s until told to close. Anything with pyserial's read
+        # and read_until will do for s, so the pipeline can be driven from a
+        # fixed byte stream.
+        self.__sync(s)
+        samples_to_filter = []
+        samples_to_send = []
+        while True:
+            # Handle incoming messages
+            if conn.poll():
+                message = conn.recv()
+                if message["command"] == "close":
+                    return
+                elif message["command"] == "set_filter_cutoff":
+                    self.filter_cutoff = message["value"]
+                elif message["command"] == "set_filter_design":
+                    self._filter_bank.redesign(message["value"])
+                elif message["command"] == "set_bias_correction":
+                    self.bias_correction = message["value"]
+                elif message["command"] == "set_idle_gating":
+                    self.idle_gating = message["value"]
+            
+            # Read, parse and (sometimes) filter data
+            data = s.read(24)
+            if parsed := self.__parse(data):
+                samples_to_filter.append(parsed)
+                if len(samples_to_filter) == self.block_size:
+                    if (block := self.__filter(samples_to_filter)) is not None:
+                        samples_to_send.extend(self.__gate(block))
+                    samples_to_filter = []
+            else:
+                self.__sync(s)
+            
+            # Send data, followed by the most recent idle summary (if any).
+            # Only the latest summary is kept, so a backed up pipe just
+            # drops stale heartbeats.
+            if (samples_to_send or self._idle_summary) and not self.__pipe_full(conn):
+                if samples_to_send:
                     conn.send(np.vstack(samples_to_send))
                     samples_to_send = []
+                if self._idle_summary:
+                    conn.send(self._idle_summary)
+                    self._idle_summary = None
     
     def __pipe_full(self, conn):
+        if isinstance(conn, ThreadConnection):
+            return conn.full()
         _, w, _ = select([], [conn], [], 0.0)
         return len(w) == 0
     
@@ -69,15 +303,14 @@ class SerialProcess:
     def __parse(self, data):
         if data[:2] == b"\x05\x3f" and len(data) == 24:
             args = [iter(data[3:-3])] * 3
-            return [int.from_bytes(b, byteorder="big", signed=True) * self.GAIN for b in zip(*args)]
+            return [int.from_bytes(b, byteorder="big", signed=True) for b in zip(*args)]
     
     def __filter(self, samples):
-        if self._filter_coeff is not None:
-            if self._filter_state is None:
-                self._filter_state = np.dstack([ss.sosfilt_zi(self._filter_coeff) * x for x in samples[0]])
-            result, self._filter_state = ss.sosfilt(self._filter_coeff, samples, axis=0, zi=self._filter_state)
-        else:
-            result = np.vstack(samples)
+        samples = np.array(samples, dtype=self._work_dtype)
+        if self._unit == 1.0:
+            samples *= self._work_dtype.type(self.GAIN)
+
+        result = self._filter_bank(samples)
         
         self._cache = np.roll(self._cache, result.shape[0], axis=0)
         self._cache[:result.shape[0], ...] = result[::-1, ...]
@@ -87,45 +320,123 @@ class SerialProcess:
         if self._counter > self._cache.shape[0]:
             if self._bias is None:
                 index = int(np.round(3.0 / 256.0e-6))
-                self._bias = self._cache[:index, ...].mean(axis=0)
+                self._bias = self._cache[:index, ...].mean(axis=0, dtype=np.float64)
             elif self.bias_correction.enabled:
                 index = int(np.round(self.bias_correction.time / 256.0e-6))
-                standard_deviations = self._cache[:index, ...].std(axis=0)
-                if np.all(standard_deviations < self.bias_correction.threshold):
-                    self._bias = self._cache[:index, ...].mean(axis=0)
+                standard_deviations = self._cache[:index, ...].std(axis=0, dtype=np.float64)
+                if np.all(standard_deviations < self.bias_correction.threshold / self._unit):
+                    self._bias = self._cache[:index, ...].mean(axis=0, dtype=np.float64)
 
         if self._bias is None:
+            if self.dtype.kind == 'i':
+                # Raw counts can't represent NaN, so hold blocks back until
+                # the bias is known.
+                return None
             return np.full_like(result, np.nan)
+        elif self.dtype.kind == 'i':
+            return np.rint(result - self._bias).astype(self.dtype)
         else:
-            return result - self._bias
+            return (result - self._bias).astype(self.dtype, copy=False)
+    
+    def __gate(self, block):
+        # Returns the blocks that should be sent on to the consumer. While the
+        # device is idle, blocks are held back in a short pre-trigger buffer
+        # and only summarised.
+        settings = self.idle_gating
+        if not settings.enabled or np.any(np.isnan(block)):
+            self._idle_samples = 0
+            return [block]
+        
+        if np.any(np.abs(block.mean(axis=0, dtype=np.float64)) >= settings.threshold / self._unit):
+            # Activity onset (or ongoing activity). Flush the pre-trigger
+            # buffer so the consumer sees the lead up to the event, and drop
+            # any summary of the idle period that hasn't been sent yet.
+            blocks = list(self._pre_trigger) + [block]
+            self._pre_trigger.clear()
+            self._reset_idle_stats()
+            self._idle_summary = None
+            self._idle_samples = 0
+            return blocks
+        
+        # Quiet block. Keep sending at full rate until we've been quiet for the
+        # hold time, so brief lulls during use don't cause gaps.
+        self._idle_samples += block.shape[0]
+        if self._idle_samples < settings.hold_time / 256e-6:
+            return [block]
+        
+        self._pre_trigger.append(block)
+        self._idle_count += block.shape[0]
+        self._idle_sum += block.sum(axis=0, dtype=np.float64)
+        self._idle_sum_squares += np.square(block, dtype=np.float64).sum(axis=0)
+        if self._idle_count >= settings.heartbeat / 256e-6:
+            self._idle_summary = IdleSummary(
+                self._idle_count,
+                self._idle_sum / self._idle_count * self._unit,
+                np.sqrt(self._idle_sum_squares / self._idle_count) * self._unit)
+            self._reset_idle_stats()
+        return []
+    
+    def _reset_idle_stats(self):
+        self._idle_count = 0
+        self._idle_sum = np.zeros(6)
+        self._idle_sum_squares = np.zeros(6)
     
     @property
     def filter_cutoff(self):
-        return self.__filter_cutoff
+        return self._filter_bank.cutoff
 
     @filter_cutoff.setter
     def filter_cutoff(self, value):
-        if value is None:
-            self._filter_coeff = None
-        else:
-            self._filter_state = None
-            self._filter_coeff = ss.butter(4, value, output='sos', fs=1/256e-6)
-        self.__filter_cutoff = value
+        self._filter_bank.cutoff = value
+    
+    @property
+    def idle_gating(self):
+        return self.__idle_gating
+    
+    @idle_gating.setter
+    def idle_gating(self, value):
+        self.__idle_gating = value
+        blocks = int(np.ceil(value.pre_trigger / (self.block_size * 256e-6)))
+        self._pre_trigger = deque(maxlen=blocks)
+        self._idle_samples = 0
+        self._reset_idle_stats()
 
 
 class Haptick:
-    def __init__(self):
+    BACKENDS = ("process", "thread")
+
+    def __init__(self, dtype=np.float64, backend="process", block_size=64):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}")
+        self.dtype = np.dtype(dtype)
+        self.backend = backend
+        self.block_size = block_size
         self._proc = None
         self.__filter_cutoff = None
+        self.__filter_design = FilterDesign()
         self.__bias_correction = BiasCorrectionSettings()
+        self.__idle_gating = IdleGatingSettings()
+        self.idle_summary = None
         
     def list_ports(self):
         return [port.device for port in serial.tools.list_ports.comports()]
 
+    def device_id(self, port):
+        # The USB serial number where there is one, so per-device settings
+        # follow the device rather than the port it's plugged into.
+        for info in serial.tools.list_ports.comports():
+            if info.device == port and info.serial_number:
+                return info.serial_number
+        return port.replace("/", "_").strip("_")
+
     def connect(self, port):
-        self._conn, conn = Pipe()
-        proc = SerialProcess(port, self.__filter_cutoff, self.__bias_correction)
-        self._proc = Process(target=proc, args=(conn, ))
+        proc = SerialProcess(port, self.__filter_cutoff, self.__bias_correction, self.__idle_gating, self.dtype, self.__filter_design, self.block_size)
+        if self.backend == "thread":
+            self._conn, conn = thread_pipe()
+            self._proc = Thread(target=proc, args=(conn, ), daemon=True)
+        else:
+            self._conn, conn = Pipe()
+            self._proc = Process(target=proc, args=(conn, ))
         self._proc.start()
     
     def disconnect(self):
@@ -133,12 +444,31 @@ class Haptick:
         if self._proc:
             self._proc.join()
     
+    def wait(self, timeout=None):
+        # Blocks until there's something for get_vals, or timeout seconds.
+        return self._conn.poll(timeout)
+    
     def get_vals(self):
         vals = []
         while self._conn.poll():
-            vals.append(self._conn.recv())
+            message = self._conn.recv()
+            if isinstance(message, IdleSummary):
+                self.idle_summary = message
+            else:
+                vals.append(message)
+                self.idle_summary = None
         return np.vstack(vals) if vals else None
     
+    @property
+    def gain(self):
+        # Volts per unit of the values returned by get_vals.
+        return SerialProcess.GAIN if self.dtype.kind == 'i' else 1.0
+    
+    def to_volts(self, values):
+        if self.dtype.kind == 'i':
+            return values * SerialProcess.GAIN
+        return values
+    
     @property
     def bias_correction(self):
         return self.__bias_correction
@@ -148,16 +478,41 @@ class Haptick:
         self.__bias_correction = value
         self._send_command("set_bias_correction", value=self.__bias_correction)
     
+    @property
+    def idle_gating(self):
+        return self.__idle_gating
+    
+    @idle_gating.setter
+    def idle_gating(self, value):
+        self.__idle_gating = value
+        self._send_command("set_idle_gating", value=self.__idle_gating)
+    
     @property
     def filter_cutoff(self):
         return self.__filter_cutoff
     
     @filter_cutoff.setter
     def filter_cutoff(self, value):
+        FilterBank.check_cutoff(value)
         self.__filter_cutoff = value
         self._send_command("set_filter_cutoff", value=self.__filter_cutoff)
     
+    @property
+    def filter_design(self):
+        return self.__filter_design
+    
+    @filter_design.setter
+    def filter_design(self, value):
+        if not isinstance(value, FilterDesign):
+            raise TypeError(f"Expected a FilterDesign, not {type(value).__name__}")
+        self.__filter_design = value
+        self._send_command("set_filter_design", value=self.__filter_design)
+    
     def _send_command(self, command, **kwargs):
+        # Nothing is listening once acquisition has stopped (a bad port or an
+        # unplugged device), and a full pipe would block forever.
+        if self._proc is not None and not self._proc.is_alive():
+            return
         try:
             message = kwargs
             message.update({"command": command})
@@ -0,0 +1,17 @@
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    # Returns a module that is only actually imported the first time one of
+    # its attributes is used. Parent packages are imported straight away, so
+    # only make the expensive part lazy (e.g. "scipy.signal", not "scipy").
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
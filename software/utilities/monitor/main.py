@@ -1,9 +1,16 @@
+import time
+START_TIME = time.perf_counter()
+
 import sys
-from PySide6.QtCore import QTimer
+from PySide6.QtCore import QTimer, Qt
 from PySide6.QtGui import QIcon
-from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog
+from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog, QMessageBox, QLabel
 from ui_mainwindow import Ui_MainWindow
-import time
+from dataclasses import replace
+from scheduler import FrameScheduler
+from recording import Recording
+from calibration import Calibration
+from visualisers import PlaybackControl
 import interface
 import numpy as np
 
@@ -32,17 +39,47 @@ class MainWindow(QMainWindow):
         self.update_timer.setInterval(20)
         self.update_timer.timeout.connect(self._update)
 
+        # Data is fed to the widgets as it arrives by _update, but they're only
+        # drawn when the scheduler says so.
+        self.scheduler = FrameScheduler(self.screen().refreshRate(), self)
+        self.scheduler.add(self.ui.voltagePlot)
+        self.scheduler.add(self.ui.psdPlot)
+        self.scheduler.add(self.ui.noiseWidget)
+        self.scheduler.add(self.ui.cubeControl.ui.cubeDisplay)
+        # Frame statistics get their own corner of the status bar, leaving
+        # messages like the calibration in use visible.
+        self.frame_stats = QLabel(self)
+        self.statusBar().addPermanentWidget(self.frame_stats)
+        self.scheduler.statsChanged.connect(self._show_frame_stats)
+        self.scheduler.start()
+
+        # Recordings can be browsed while we're not connected.
+        file_menu = self.menuBar().addMenu("&File")
+        self.open_action = file_menu.addAction("&Open Recording...", self._open_recording)
+        self.playback = PlaybackControl(self)
+        self.playback.selectionChanged.connect(self._show_selection)
+        self.playback.hide()
+        self.ui.verticalLayout.addWidget(self.playback)
+
         self.__file = None
+        self.__raw = False
     
     def closeEvent(self, event):
         super().closeEvent(event)
         if self.__file:
             self._stop_record()
         self.update_timer.stop()
+        self.scheduler.stop()
         self.haptick.disconnect()
 
     def _connect(self):
-        self.haptick.connect(self.ui.serialPortCombo.currentText())
+        self._close_recording()
+        self.open_action.setDisabled(True)
+        port = self.ui.serialPortCombo.currentText()
+        calibration = Calibration.for_device(self.haptick.device_id(port))
+        self.ui.cubeControl.set_calibration(calibration)
+        self.statusBar().showMessage(f"Using {calibration.device} calibration")
+        self.haptick.connect(port)
         self.update_timer.start()
         self.ui.serialPortCombo.setDisabled(True)
         self.ui.serialConnectButton.setText("Disconnect")
@@ -53,6 +90,7 @@ class MainWindow(QMainWindow):
     def _disconnect(self):
         self.update_timer.stop()
         self.haptick.disconnect()
+        self.open_action.setDisabled(False)
         self.ui.serialPortCombo.setDisabled(False)
         self.ui.serialConnectButton.setText("Connect")
         self.ui.serialConnectButton.setIcon(QIcon(":/icons/connect"))
@@ -74,10 +112,19 @@ class MainWindow(QMainWindow):
         self.update_timer.stop()
 
         # Get a filename and update the button state.
-        file_name, _ = QFileDialog.getSaveFileName(self, "Record File", "", "Comma Separated Values (*.csv)")
+        file_name, file_filter = QFileDialog.getSaveFileName(
+            self, "Record File", "", "Comma Separated Values (*.csv);;Raw float32 (*.f32)")
 
         if file_name:
-            self.__file = open(file_name, 'w')
+            # Raw recordings are six little endian float32s per sample, which
+            # can be opened for browsing without any conversion.
+            self.__raw = file_filter.startswith("Raw")
+            self.__file = open(file_name, 'wb' if self.__raw else 'w')
+
+            # Recordings always want full rate data, so turn off idle gating
+            # until recording stops.
+            self.__idle_gating = self.haptick.idle_gating
+            self.haptick.idle_gating = replace(self.__idle_gating, enabled=False)
             self.ui.recordButton.toggled.disconnect(self._start_record)
             self.ui.recordButton.toggled.connect(self._stop_record)
         else:
@@ -94,6 +141,7 @@ class MainWindow(QMainWindow):
     def _stop_record(self):
         self.__file.close()
         self.__file = None
+        self.haptick.idle_gating = self.__idle_gating
         self.ui.recordButton.toggled.disconnect(self._stop_record)
         self.ui.recordButton.toggled.connect(self._start_record)
         self.ui.recordButton.setIcon(QIcon(":/icons/record"))
@@ -107,7 +155,9 @@ class MainWindow(QMainWindow):
             self.ui.noiseWidget.add_values(vals)
             self.ui.cubeControl.add_values(vals)
             
-            if self.__file:
+            if self.__file and self.__raw:
+                vals.astype('<f4').tofile(self.__file)
+            elif self.__file:
                 np.savetxt(self.__file, vals, fmt="%.3e", delimiter=",")
         
         if self.ui.recordButton.isChecked():
@@ -116,6 +166,41 @@ class MainWindow(QMainWindow):
             else:
                 self.ui.recordButton.setIcon(QIcon(":/icons/record"))
     
+    def _open_recording(self):
+        file_name, _ = QFileDialog.getOpenFileName(self, "Open Recording", "", "Recordings (*.csv *.f32)")
+        if not file_name:
+            return
+
+        # The first open of a recording converts and indexes it, which can take
+        # a while for long ones.
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            recording = Recording(file_name)
+        except (OSError, ValueError) as error:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.warning(self, "Open Recording", f"Couldn't open {file_name}: {error}")
+            return
+        QApplication.restoreOverrideCursor()
+
+        self.playback.set_recording(recording)
+        self.playback.show()
+    
+    def _close_recording(self):
+        self.playback.hide()
+        self.playback.recording = None
+    
+    def _show_selection(self, start, stop):
+        recording = self.playback.recording
+        period = recording.PERIOD
+        plot = self.ui.voltagePlot
+        plot.show_envelope(*recording.envelope(start, stop, plot.BUCKETS), (start * period, stop * period))
+        self.ui.psdPlot.show_samples(recording.segments(start, stop, self.ui.psdPlot.SEGMENT, 256))
+        self.ui.noiseWidget.show_rms(recording.statistics(start, stop)[1])
+        self.ui.cubeControl.replay(recording.means(start, stop, 500), (stop - start) * period / 500)
+    
+    def _show_frame_stats(self, frame_rate, dropped_frames):
+        self.frame_stats.setText(f"{frame_rate:.0f} fps, {dropped_frames} dropped frames")
+    
     def _change_filter_cutoff(self, value):
         if value == 99:
             self.haptick.filter_cutoff = None
@@ -140,4 +225,12 @@ if __name__ == "__main__":
     window = MainWindow()
     window.show()
 
+    # Report how long it took to get the window on screen and quit. Used by
+    # benchmark_startup.py to keep an eye on startup time.
+    if "--startup-time" in sys.argv:
+        def report():
+            print(f"{time.perf_counter() - START_TIME:.4f}")
+            app.quit()
+        QTimer.singleShot(0, report)
+
     sys.exit(app.exec())
\ No newline at end of file
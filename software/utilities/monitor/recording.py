@@ -0,0 +1,202 @@
+from itertools import islice
+from pathlib import Path
+import numpy as np
+
+# Seconds between samples, the one definition for tools working on recordings.
+PERIOD = 256e-6
+
+
+class Recording:
+    # A recording opened for browsing. Samples are memory mapped from a raw
+    # little endian float32 file (six channels per row), so nothing is read
+    # until it's needed. CSV recordings are converted to a raw sidecar file on
+    # first open.
+    #
+    # Alongside the recording we keep a pyramid index: per-channel min, max,
+    # sum and sum of squares (plus a count of non-NaN rows) over buckets of
+    # BASE samples, then repeatedly over FACTOR buckets of the level below.
+    # Any view of the recording can then be drawn or summarised from a few
+    # thousand index entries plus at most a bucket's worth of raw samples at
+    # either end.
+    PERIOD = PERIOD
+    BASE = 256
+    FACTOR = 4
+    CHUNK = 1 << 20
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.data = open_samples(self.path)
+
+        index = Path(str(self.path) + '.pyramid.npz')
+        key = _source_key(self.path)
+        self.levels = self._load_index(index, key)
+        if self.levels is None:
+            self.levels = self._build_index()
+            try:
+                arrays = {f"{name}{i}": level[name] for i, level in enumerate(self.levels) for name in level}
+                np.savez(index, key=key, **arrays)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def duration(self):
+        return len(self) * self.PERIOD
+
+    def envelope(self, start, stop, buckets):
+        # Min and max of each of the given number of equal width buckets
+        # between start and stop, each (buckets, 6).
+        edges = np.linspace(start, stop, buckets + 1).astype(np.int64)[:-1]
+        size, level = self._level_for((stop - start) / buckets)
+        if level is None:
+            block = self.data[start:stop]
+            indices = edges - start
+            return np.fmin.reduceat(block, indices), np.fmax.reduceat(block, indices)
+        end = min(-(-stop // size), len(level['min']))
+        indices = np.minimum(edges // size, end - 1)
+        return np.fmin.reduceat(level['min'][:end], indices), np.fmax.reduceat(level['max'][:end], indices)
+
+    def means(self, start, stop, buckets):
+        # Mean of each of the given number of equal width buckets, (buckets, 6).
+        edges = np.linspace(start, stop, buckets + 1).astype(np.int64)[:-1]
+        size, level = self._level_for((stop - start) / buckets)
+        if level is None:
+            block = np.asarray(self.data[start:stop], dtype=np.float64)
+            indices = edges - start
+            sums = np.add.reduceat(np.nan_to_num(block), indices)
+            counts = np.add.reduceat(~np.isnan(block).any(axis=1), indices)
+        else:
+            end = min(-(-stop // size), len(level['sum']))
+            indices = np.minimum(edges // size, end - 1)
+            sums = np.add.reduceat(level['sum'][:end], indices)
+            counts = np.add.reduceat(level['count'][:end], indices)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.nan_to_num(sums / counts[:, np.newaxis])
+
+    def statistics(self, start, stop):
+        # Exact per-channel mean and standard deviation between start and
+        # stop, ignoring NaN rows.
+        first, last = -(-start // self.BASE), stop // self.BASE
+        if first >= last:
+            first = last = start // self.BASE
+            edges = [self.data[start:stop]]
+        else:
+            edges = [self.data[start:first * self.BASE], self.data[last * self.BASE:stop]]
+        level = self.levels[0]
+        count = level['count'][first:last].sum()
+        total = level['sum'][first:last].sum(axis=0)
+        squares = level['sumsq'][first:last].sum(axis=0)
+        for edge in edges:
+            edge = np.asarray(edge, dtype=np.float64)
+            edge = edge[~np.isnan(edge).any(axis=1)]
+            count += len(edge)
+            total += edge.sum(axis=0)
+            squares += np.square(edge).sum(axis=0)
+        if count == 0:
+            return np.full(6, np.nan), np.full(6, np.nan)
+        mean = total / count
+        return mean, np.sqrt(np.maximum(squares / count - mean ** 2, 0.0))
+
+    def segments(self, start, stop, length, count):
+        # Up to count evenly spaced segments of length samples between start
+        # and stop, concatenated. Lets spectra be estimated over long ranges at
+        # a bounded cost.
+        if stop - start <= length * count:
+            return np.asarray(self.data[start:stop])
+        starts = np.linspace(start, stop - length, count).astype(np.int64)
+        return np.concatenate([self.data[s:s + length] for s in starts])
+
+    def _level_for(self, width):
+        # The coarsest pyramid level whose buckets are no wider than width, or
+        # None if raw samples are needed.
+        size, chosen = self.BASE, None
+        for level in self.levels:
+            if size > width or len(level['min']) == 0:
+                break
+            chosen = size, level
+            size *= self.FACTOR
+        return chosen if chosen else (1, None)
+
+    def _build_index(self):
+        chunk = self.CHUNK // self.BASE * self.BASE
+        complete = len(self.data) // self.BASE * self.BASE
+        parts = []
+        for start in range(0, complete, chunk):
+            block = np.asarray(self.data[start:min(start + chunk, complete)], dtype=np.float64)
+            parts.append(_summarise(block.reshape(-1, self.BASE, 6)))
+        if not parts:
+            parts.append(_summarise(np.zeros((0, self.BASE, 6))))
+        levels = [{name: np.concatenate([part[name] for part in parts]) for name in parts[0]}]
+
+        while len(levels[-1]['min']) >= 2 * self.FACTOR * 1024:
+            below = levels[-1]
+            length = len(below['min']) // self.FACTOR * self.FACTOR
+            grouped = {name: array[:length].reshape(-1, self.FACTOR, *array.shape[1:]) for name, array in below.items()}
+            levels.append({
+                'min': np.fmin.reduce(grouped['min'], axis=1),
+                'max': np.fmax.reduce(grouped['max'], axis=1),
+                'sum': grouped['sum'].sum(axis=1),
+                'sumsq': grouped['sumsq'].sum(axis=1),
+                'count': grouped['count'].sum(axis=1),
+            })
+        return levels
+
+    def _load_index(self, path, key):
+        try:
+            with np.load(path) as index:
+                if str(index['key']) != key:
+                    return None
+                levels = []
+                while f"min{len(levels)}" in index:
+                    i = len(levels)
+                    levels.append({name: index[f"{name}{i}"] for name in ('min', 'max', 'sum', 'sumsq', 'count')})
+                return levels or None
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def open_samples(path):
+    # Memory maps the samples of a recording as a (samples, 6) float32 array.
+    # CSV recordings are converted to a raw sidecar file first, unless there's
+    # already one newer than the CSV.
+    path = Path(path)
+    if path.suffix == '.f32':
+        raw = path
+    else:
+        raw = Path(str(path) + '.f32')
+        if not raw.exists() or raw.stat().st_mtime_ns < path.stat().st_mtime_ns:
+            _convert_csv(path, raw)
+
+    if raw.stat().st_size < 24:
+        raise ValueError(f"{path} doesn't contain any samples")
+    data = np.memmap(raw, dtype='<f4', mode='r')
+    return data[:len(data) // 6 * 6].reshape(-1, 6)
+
+
+def _summarise(blocks):
+    # Summaries of (buckets, samples, 6) blocks. Rows containing NaN (before
+    # the bias is known) are left out of the sums and counts.
+    valid = ~np.isnan(blocks).any(axis=2)
+    values = np.where(valid[..., np.newaxis], blocks, 0.0)
+    return {
+        'min': np.fmin.reduce(blocks, axis=1).astype(np.float32),
+        'max': np.fmax.reduce(blocks, axis=1).astype(np.float32),
+        'sum': values.sum(axis=1),
+        'sumsq': np.square(values).sum(axis=1),
+        'count': valid.sum(axis=1).astype(np.int64),
+    }
+
+
+def _convert_csv(source, destination, rows=65536):
+    temporary = destination.with_name(destination.name + '.tmp')
+    with open(source) as lines, open(temporary, 'wb') as out:
+        while batch := list(islice(lines, rows)):
+            np.loadtxt(batch, delimiter=',', dtype=np.float32, ndmin=2).astype('<f4').tofile(out)
+    temporary.replace(destination)
+
+
+def _source_key(path):
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
@@ -0,0 +1,234 @@
+# Resource object code (Python 3)
+# Created by: object code
+# Created by: The Resource Compiler for Qt version 6.12.0
+# WARNING! All changes made in this file will be lost!
+
+from PySide6 import QtCore
+
+qt_resource_data = b"\
+\x00\x00\x02(\
+<\
+svg xmlns=\x22http:\
+//www.w3.org/200\
+0/svg\x22 class=\x22ic\
+on icon-tabler i\
+con-tabler-plug-\
+connected\x22 width\
+=\x2224\x22 height=\x2224\
+\x22 viewBox=\x220 0 2\
+4 24\x22 stroke-wid\
+th=\x222\x22 stroke=\x22c\
+urrentColor\x22 fil\
+l=\x22none\x22 stroke-\
+linecap=\x22round\x22 \
+stroke-linejoin=\
+\x22round\x22>\x0a  <path\
+ stroke=\x22none\x22 d\
+=\x22M0 0h24v24H0z\x22\
+ fill=\x22none\x22/>\x0a \
+ <path d=\x22M7 12l\
+5 5l-1.5 1.5a3.5\
+36 3.536 0 1 1 -\
+5 -5l1.5 -1.5z\x22 \
+/>\x0a  <path d=\x22M1\
+7 12l-5 -5l1.5 -\
+1.5a3.536 3.536 \
+0 1 1 5 5l-1.5 1\
+.5z\x22 />\x0a  <path \
+d=\x22M3 21l2.5 -2.\
+5\x22 />\x0a  <path d=\
+\x22M18.5 5.5l2.5 -\
+2.5\x22 />\x0a  <path \
+d=\x22M10 11l-2 2\x22 \
+/>\x0a  <path d=\x22M1\
+3 14l-2 2\x22 />\x0a</\
+svg>\x0a\x0a\x0a\
+\x00\x00\x02_\
+<\
+svg xmlns=\x22http:\
+//www.w3.org/200\
+0/svg\x22 class=\x22ic\
+on icon-tabler i\
+con-tabler-plug-\
+connected-x\x22 wid\
+th=\x2224\x22 height=\x22\
+24\x22 viewBox=\x220 0\
+ 24 24\x22 stroke-w\
+idth=\x222\x22 stroke=\
+\x22currentColor\x22 f\
+ill=\x22none\x22 strok\
+e-linecap=\x22round\
+\x22 stroke-linejoi\
+n=\x22round\x22>\x0a  <pa\
+th stroke=\x22none\x22\
+ d=\x22M0 0h24v24H0\
+z\x22 fill=\x22none\x22/>\
+\x0a  <path d=\x22M20 \
+16l-4 4\x22 />\x0a  <p\
+ath d=\x22M7 12l5 5\
+l-1.5 1.5a3.536 \
+3.536 0 1 1 -5 -\
+5l1.5 -1.5z\x22 />\x0a\
+  <path d=\x22M17 1\
+2l-5 -5l1.5 -1.5\
+a3.536 3.536 0 1\
+ 1 5 5l-1.5 1.5z\
+\x22 />\x0a  <path d=\x22\
+M3 21l2.5 -2.5\x22 \
+/>\x0a  <path d=\x22M1\
+8.5 5.5l2.5 -2.5\
+\x22 />\x0a  <path d=\x22\
+M10 11l-2 2\x22 />\x0a\
+  <path d=\x22M13 1\
+4l-2 2\x22 />\x0a  <pa\
+th d=\x22M16 16l4 4\
+\x22 />\x0a</svg>\x0a\x0a\x0a\
+\x00\x00\x04\xcd\
+<\
+?xml version=\x221.\
+0\x22 encoding=\x22UTF\
+-8\x22 standalone=\x22\
+no\x22?>\x0a<!-- Creat\
+ed with Inkscape\
+ (http://www.ink\
+scape.org/) -->\x0a\
+\x0a<svg\x0a   width=\x22\
+16\x22\x0a   height=\x221\
+6\x22\x0a   viewBox=\x220\
+ 0 4.2333332 4.2\
+333333\x22\x0a   versi\
+on=\x221.1\x22\x0a   id=\x22\
+svg188\x22\x0a   inksc\
+ape:version=\x221.2\
+.2 (b0a8486541, \
+2022-12-01)\x22\x0a   \
+sodipodi:docname\
+=\x22blank-icon.svg\
+\x22\x0a   xmlns:inksc\
+ape=\x22http://www.\
+inkscape.org/nam\
+espaces/inkscape\
+\x22\x0a   xmlns:sodip\
+odi=\x22http://sodi\
+podi.sourceforge\
+.net/DTD/sodipod\
+i-0.dtd\x22\x0a   xmln\
+s=\x22http://www.w3\
+.org/2000/svg\x22\x0a \
+  xmlns:svg=\x22htt\
+p://www.w3.org/2\
+000/svg\x22>\x0a  <sod\
+ipodi:namedview\x0a\
+     id=\x22namedvi\
+ew190\x22\x0a     page\
+color=\x22#ffffff\x22\x0a\
+     bordercolor\
+=\x22#666666\x22\x0a     \
+borderopacity=\x221\
+.0\x22\x0a     inkscap\
+e:showpageshadow\
+=\x222\x22\x0a     inksca\
+pe:pageopacity=\x22\
+0.0\x22\x0a     inksca\
+pe:pagecheckerbo\
+ard=\x220\x22\x0a     ink\
+scape:deskcolor=\
+\x22#d1d1d1\x22\x0a     i\
+nkscape:document\
+-units=\x22mm\x22\x0a    \
+ showgrid=\x22false\
+\x22\x0a     inkscape:\
+zoom=\x2216\x22\x0a     i\
+nkscape:cx=\x2227.6\
+5625\x22\x0a     inksc\
+ape:cy=\x226\x22\x0a     \
+inkscape:window-\
+width=\x222560\x22\x0a   \
+  inkscape:windo\
+w-height=\x221531\x22\x0a\
+     inkscape:wi\
+ndow-x=\x220\x22\x0a     \
+inkscape:window-\
+y=\x220\x22\x0a     inksc\
+ape:window-maxim\
+ized=\x221\x22\x0a     in\
+kscape:current-l\
+ayer=\x22layer1\x22 />\
+\x0a  <defs\x0a     id\
+=\x22defs185\x22 />\x0a  \
+<g\x0a     inkscape\
+:label=\x22Layer 1\x22\
+\x0a     inkscape:g\
+roupmode=\x22layer\x22\
+\x0a     id=\x22layer1\
+\x22 />\x0a</svg>\x0a\
+\x00\x00\x01K\
+<\
+svg xmlns=\x22http:\
+//www.w3.org/200\
+0/svg\x22 class=\x22ic\
+on icon-tabler i\
+con-tabler-playe\
+r-record\x22 width=\
+\x2224\x22 height=\x2224\x22\
+ viewBox=\x220 0 24\
+ 24\x22 stroke-widt\
+h=\x222\x22 stroke=\x22cu\
+rrentColor\x22 fill\
+=\x22none\x22 stroke-l\
+inecap=\x22round\x22 s\
+troke-linejoin=\x22\
+round\x22>\x0a  <path \
+stroke=\x22none\x22 d=\
+\x22M0 0h24v24H0z\x22 \
+fill=\x22none\x22/>\x0a  \
+<circle cx=\x2212\x22 \
+cy=\x2212\x22 r=\x227\x22 />\
+\x0a</svg>\x0a\x0a\x0a\
+"
+
+qt_resource_name = b"\
+\x00\x05\
+\x00o\xa6S\
+\x00i\
+\x00c\x00o\x00n\x00s\
+\x00\x07\
+\x0aeKd\
+\x00c\
+\x00o\x00n\x00n\x00e\x00c\x00t\
+\x00\x0a\
+\x0ah*\x84\
+\x00d\
+\x00i\x00s\x00c\x00o\x00n\x00n\x00e\x00c\x00t\
+\x00\x05\
+\x00i(K\
+\x00b\
+\x00l\x00a\x00n\x00k\
+\x00\x06\
+\x07\x8b\xa6\x84\
+\x00r\
+\x00e\x00c\x00o\x00r\x00d\
+"
+
+qt_resource_struct = b"\
+\x00\x00\x00\x00\x00\x02\x00\x00\x00\x01\x00\x00\x00\x01\
+\x00\x00\x00\x00\x00\x00\x00\x00\
+\x00\x00\x00\x00\x00\x02\x00\x00\x00\x04\x00\x00\x00\x02\
+\x00\x00\x00\x00\x00\x00\x00\x00\
+\x00\x00\x00>\x00\x00\x00\x00\x00\x01\x00\x00\x04\x8f\
+\x00\x00\x01\x87=\xa9D`\
+\x00\x00\x00N\x00\x00\x00\x00\x00\x01\x00\x00\x09`\
+\x00\x00\x01\x87=\xa9D`\
+\x00\x00\x00\x10\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\
+\x00\x00\x01\x87=\xa9D`\
+\x00\x00\x00$\x00\x00\x00\x00\x00\x01\x00\x00\x02,\
+\x00\x00\x01\x87=\xa9D`\
+"
+
+def qInitResources():
+    QtCore.qRegisterResourceData(0x03, qt_resource_struct, qt_resource_name, qt_resource_data)
+
+def qCleanupResources():
+    QtCore.qUnregisterResourceData(0x03, qt_resource_struct, qt_resource_name, qt_resource_data)
+
+qInitResources()
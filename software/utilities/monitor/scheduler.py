@@ -0,0 +1,81 @@
+import time
+from PySide6.QtCore import QObject, QTimer, Qt, Signal
+
+
+class FrameScheduler(QObject):
+    # Paces rendering for a set of widgets independently of data arrival.
+    # Widgets take data in add_values (cheap, every batch), set their changed
+    # attribute, and do the expensive work in render_frame. Each tick, every
+    # visible widget that has changed is rendered once.
+    #
+    # Lateness of the tick timer is how we notice rendering falling behind.
+    # Every whole interval a tick arrives late counts as a dropped frame. When
+    # frames are dropped the interval is stretched, and once things have been
+    # smooth for a while it creeps back towards the display refresh interval.
+    MAX_INTERVAL = 0.1
+    RECOVERY_TIME = 2.0
+
+    statsChanged = Signal(float, int)
+
+    def __init__(self, refresh_rate=60.0, parent=None):
+        super().__init__(parent)
+        self.widgets = []
+        self.refresh_interval = 1.0 / refresh_rate
+        self.interval = self.refresh_interval
+        self.dropped_frames = 0
+        self.frame_rate = 0.0
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+        self._last_tick = None
+        self._smooth_since = None
+        self._frames = 0
+        self._stats_start = None
+
+    def add(self, widget):
+        self.widgets.append(widget)
+
+    def start(self):
+        self._last_tick = None
+        self._smooth_since = self._stats_start = time.perf_counter()
+        self._frames = 0
+        self._set_interval(self.refresh_interval)
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def _tick(self):
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            self._pace(now - self._last_tick, now)
+        self._last_tick = now
+
+        rendered = False
+        for widget in self.widgets:
+            if widget.changed and widget.isVisible():
+                widget.render_frame()
+                widget.changed = False
+                rendered = True
+        self._frames += rendered
+
+        if now - self._stats_start >= 1.0:
+            self.frame_rate = self._frames / (now - self._stats_start)
+            self.statsChanged.emit(self.frame_rate, self.dropped_frames)
+            self._frames = 0
+            self._stats_start = now
+
+    def _pace(self, elapsed, now):
+        dropped = int(elapsed / (self._timer.interval() / 1e3) + 0.5) - 1
+        if dropped > 0:
+            self.dropped_frames += dropped
+            self._smooth_since = now
+            self._set_interval(min(self.interval * 1.5, self.MAX_INTERVAL))
+        elif self.interval > self.refresh_interval and now - self._smooth_since > self.RECOVERY_TIME:
+            self._smooth_since = now
+            self._set_interval(max(self.interval / 1.5, self.refresh_interval))
+
+    def _set_interval(self, interval):
+        self.interval = interval
+        self._timer.setInterval(max(int(round(interval * 1e3)), 1))
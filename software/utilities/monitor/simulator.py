@@ -0,0 +1,99 @@
+import os
+import time
+import tty
+from select import select
+from threading import Thread, Event
+import numpy as np
+from recording import PERIOD
+
+
+class Simulator:
+    # Pretends to be a Haptick by streaming ADC frames into a pseudo-terminal.
+    # The port can be handed to Haptick.connect like a real serial device.
+    PERIOD = PERIOD
+    STATUS = b"\x05\x3f\x00"
+    CRC = b"\x00\x00\x00"
+
+    def __init__(self, offsets=None, noise=300.0, speed=1.0, seed=None):
+        self.offsets = np.zeros(6) if offsets is None else np.asarray(offsets, dtype=np.float64)
+        self.noise = noise
+        self.speed = speed
+        self.load = np.zeros(6)
+        self.frames_written = 0
+
+        self._rng = np.random.default_rng(seed)
+        self._stop = Event()
+        self._thread = None
+        self._master = None
+        self._slave = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    @property
+    def port(self):
+        return os.ttyname(self._slave)
+
+    def start(self):
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self._stop.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def frames(self, count):
+        # Generate count frames of raw ADC data as bytes.
+        counts = self.offsets + self.load + self._rng.normal(0.0, self.noise, (count, 6))
+        return self.encode(np.rint(counts).astype(np.int64))
+
+    @classmethod
+    def encode(cls, counts):
+        counts = np.clip(counts, -2 ** 23, 2 ** 23 - 1).astype('>i4')
+        channels = counts.view(np.uint8).reshape(-1, 6, 4)[..., 1:].reshape(-1, 18)
+        status = np.broadcast_to(np.frombuffer(cls.STATUS, np.uint8), (len(channels), 3))
+        crc = np.broadcast_to(np.frombuffer(cls.CRC, np.uint8), (len(channels), 3))
+        return np.hstack((status, channels, crc)).tobytes()
+
+    def _run(self):
+        # Write frames in small bursts, pacing them against the wall clock so
+        # the average rate matches the real device (scaled by speed).
+        start = time.monotonic()
+        while not self._stop.is_set():
+            due = int((time.monotonic() - start) * self.speed / self.PERIOD)
+            count = min(due - self.frames_written, 256)
+            if count > 0:
+                if not self._write(self.frames(count)):
+                    return
+                self.frames_written += count
+            else:
+                time.sleep(0.002)
+
+    def _write(self, data):
+        # Nobody may be reading the port, so never block indefinitely on a
+        # full pseudo-terminal buffer or stop() could hang.
+        data = memoryview(data)
+        while data:
+            if self._stop.is_set():
+                return False
+            try:
+                data = data[os.write(self._master, data):]
+            except BlockingIOError:
+                select([], [self._master], [], 0.1)
+            except OSError:
+                return False
+        return True
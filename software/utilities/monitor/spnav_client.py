@@ -0,0 +1,112 @@
+import argparse
+import socket
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from threading import Thread, Event
+import numpy as np
+import daemon
+from simulator import Simulator
+
+
+def events(sock, timeout=None):
+    # Yields (type, values) for each event from a spacenavd socket, or None
+    # if nothing arrives within timeout seconds.
+    sock.settimeout(timeout)
+    buffer = b""
+    while True:
+        try:
+            data = sock.recv(4096)
+        except socket.timeout:
+            yield None
+            continue
+        if not data:
+            return
+        buffer += data
+        while len(buffer) >= daemon.SpnavServer.EVENT.size:
+            event = daemon.SpnavServer.EVENT.unpack_from(buffer)
+            buffer = buffer[daemon.SpnavServer.EVENT.size:]
+            yield event[0], event[1:]
+
+
+def connect(path, timeout=5.0):
+    start = time.perf_counter()
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(str(path))
+            return sock
+        except (FileNotFoundError, ConnectionRefusedError):
+            sock.close()
+            if time.perf_counter() - start > timeout:
+                raise
+            time.sleep(0.05)
+
+
+def measure_latency(trials, settle, step=5000.0):
+    # Runs the daemon against a simulator, then repeatedly steps the simulated
+    # load on one channel and times how long until a motion event arrives.
+    # This is from the first loaded sample being generated to the event being
+    # read, so includes the serial link, acquisition, the daemon and the
+    # socket.
+    with tempfile.TemporaryDirectory() as directory, Simulator(noise=30.0) as simulator:
+        path = Path(directory) / "spnav.sock"
+        stop = Event()
+        thread = Thread(target=daemon.run, args=(simulator.port, daemon.DaemonSettings(str(path))),
+                        kwargs={"stop": stop}, daemon=True)
+        thread.start()
+        try:
+            sock = connect(path)
+            stream = events(sock, timeout=1.0)
+
+            # The first few seconds are spent finding the bias.
+            time.sleep(settle)
+            latencies = []
+            for _ in range(trials):
+                load = np.zeros(6)
+                load[0] = step
+                simulator.load = load
+                start = time.perf_counter()
+                for event in stream:
+                    if event is None:
+                        raise RuntimeError("no motion event within a second of a load step")
+                    if any(event[1][:6]):
+                        latencies.append(time.perf_counter() - start)
+                        break
+                simulator.load = np.zeros(6)
+                for event in stream:
+                    if event is None or not any(event[1][:6]):
+                        break
+                time.sleep(np.random.uniform(0.05, 0.1))
+            sock.close()
+        finally:
+            stop.set()
+            thread.join()
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print events from a spacenavd socket, or measure the daemon's latency.")
+    parser.add_argument("--socket", default=daemon.DaemonSettings.socket_path)
+    parser.add_argument("--latency", type=int, metavar="TRIALS",
+                        help="run the daemon against a simulator and measure load step to event latency")
+    parser.add_argument("--settle", type=float, default=5.0, help="seconds to wait for the bias before measuring")
+    parser.add_argument("--budget", type=float, default=10e-3, help="fail if the 95th percentile latency exceeds this")
+    args = parser.parse_args()
+
+    if args.latency:
+        latencies = sorted(measure_latency(args.latency, args.settle))
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(f"latency over {len(latencies)} steps: min {latencies[0] * 1e3:.1f}ms, "
+              f"median {statistics.median(latencies) * 1e3:.1f}ms, 95% {p95 * 1e3:.1f}ms, "
+              f"max {latencies[-1] * 1e3:.1f}ms")
+        if p95 > args.budget:
+            print(f"over the {args.budget * 1e3:.0f}ms budget")
+            raise SystemExit(1)
+    else:
+        for event in events(connect(args.socket)):
+            kind, values = event
+            if kind == daemon.SpnavServer.MOTION:
+                print(f"motion t({values[0]:5d} {values[1]:5d} {values[2]:5d}) "
+                      f"r({values[3]:5d} {values[4]:5d} {values[5]:5d}) period {values[6]}ms")
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+################################################################################
+## Form generated from reading UI file 'cube_control.ui'
+##
+## Created by: Qt User Interface Compiler version 6.12.0
+##
+## WARNING! All changes made in this file will be lost when recompiling UI file!
+################################################################################
+
+from PySide6.QtCore import (QCoreApplication, QDate, QDateTime, QLocale,
+    QMetaObject, QObject, QPoint, QRect,
+    QSize, QTime, QUrl, Qt)
+from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
+    QFont, QFontDatabase, QGradient, QIcon,
+    QImage, QKeySequence, QLinearGradient, QPainter,
+    QPalette, QPixmap, QRadialGradient, QTransform)
+from PySide6.QtWidgets import (QApplication, QFormLayout, QFrame, QGroupBox,
+    QHBoxLayout, QLabel, QPushButton, QSizePolicy,
+    QSlider, QSpacerItem, QVBoxLayout, QWidget)
+
+from visualisers import CubeDisplay
+
+class Ui_CubeControl(object):
+    def setupUi(self, CubeControl):
+        if not CubeControl.objectName():
+            CubeControl.setObjectName(u"CubeControl")
+        CubeControl.resize(716, 450)
+        self.horizontalLayout = QHBoxLayout(CubeControl)
+        self.horizontalLayout.setSpacing(0)
+        self.horizontalLayout.setObjectName(u"horizontalLayout")
+        self.horizontalLayout.setContentsMargins(0, 0, 0, 0)
+        self.cubeDisplay = CubeDisplay(CubeControl)
+        self.cubeDisplay.setObjectName(u"cubeDisplay")
+        sizePolicy = QSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.cubeDisplay.sizePolicy().hasHeightForWidth())
+        self.cubeDisplay.setSizePolicy(sizePolicy)
+
+        self.horizontalLayout.addWidget(self.cubeDisplay)
+
+        self.line = QFrame(CubeControl)
+        self.line.setObjectName(u"line")
+        self.line.setFrameShadow(QFrame.Raised)
+        self.line.setFrameShape(QFrame.Shape.VLine)
+
+        self.horizontalLayout.addWidget(self.line)
+
+        self.verticalLayout = QVBoxLayout()
+        self.verticalLayout.setSpacing(6)
+        self.verticalLayout.setObjectName(u"verticalLayout")
+        self.verticalLayout.setContentsMargins(9, 9, 9, 9)
+        self.groupBox = QGroupBox(CubeControl)
+        self.groupBox.setObjectName(u"groupBox")
+        self.formLayout = QFormLayout(self.groupBox)
+        self.formLayout.setObjectName(u"formLayout")
+        self.formLayout.setFormAlignment(Qt.AlignLeading|Qt.AlignLeft|Qt.AlignVCenter)
+        self.label = QLabel(self.groupBox)
+        self.label.setObjectName(u"label")
+
+        self.formLayout.setWidget(0, QFormLayout.ItemRole.LabelRole, self.label)
+
+        self.rotationSlider = QSlider(self.groupBox)
+        self.rotationSlider.setObjectName(u"rotationSlider")
+        self.rotationSlider.setSliderPosition(10)
+        self.rotationSlider.setOrientation(Qt.Horizontal)
+
+        self.formLayout.setWidget(0, QFormLayout.ItemRole.FieldRole, self.rotationSlider)
+
+        self.label_2 = QLabel(self.groupBox)
+        self.label_2.setObjectName(u"label_2")
+
+        self.formLayout.setWidget(1, QFormLayout.ItemRole.LabelRole, self.label_2)
+
+        self.translationSlider = QSlider(self.groupBox)
+        self.translationSlider.setObjectName(u"translationSlider")
+        self.translationSlider.setSliderPosition(10)
+        self.translationSlider.setOrientation(Qt.Horizontal)
+
+        self.formLayout.setWidget(1, QFormLayout.ItemRole.FieldRole, self.translationSlider)
+
+
+        self.verticalLayout.addWidget(self.groupBox)
+
+        self.formLayout_2 = QFormLayout()
+        self.formLayout_2.setObjectName(u"formLayout_2")
+        self.thresholdLabel = QLabel(CubeControl)
+        self.thresholdLabel.setObjectName(u"thresholdLabel")
+
+        self.formLayout_2.setWidget(0, QFormLayout.ItemRole.LabelRole, self.thresholdLabel)
+
+        self.thresholdSlider = QSlider(CubeControl)
+        self.thresholdSlider.setObjectName(u"thresholdSlider")
+        self.thresholdSlider.setSliderPosition(10)
+        self.thresholdSlider.setOrientation(Qt.Horizontal)
+
+        self.formLayout_2.setWidget(0, QFormLayout.ItemRole.FieldRole, self.thresholdSlider)
+
+
+        self.verticalLayout.addLayout(self.formLayout_2)
+
+        self.verticalSpacer = QSpacerItem(20, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding)
+
+        self.verticalLayout.addItem(self.verticalSpacer)
+
+        self.resetButton = QPushButton(CubeControl)
+        self.resetButton.setObjectName(u"resetButton")
+
+        self.verticalLayout.addWidget(self.resetButton)
+
+
+        self.horizontalLayout.addLayout(self.verticalLayout)
+
+        self.horizontalLayout.setStretch(0, 5)
+        self.horizontalLayout.setStretch(2, 2)
+
+        self.retranslateUi(CubeControl)
+
+        QMetaObject.connectSlotsByName(CubeControl)
+    # setupUi
+
+    def retranslateUi(self, CubeControl):
+        CubeControl.setWindowTitle(QCoreApplication.translate("CubeControl", u"Form", None))
+        self.groupBox.setTitle(QCoreApplication.translate("CubeControl", u"Sensitivity", None))
+        self.label.setText(QCoreApplication.translate("CubeControl", u"Rotation", None))
+        self.label_2.setText(QCoreApplication.translate("CubeControl", u"Translation", None))
+        self.thresholdLabel.setText(QCoreApplication.translate("CubeControl", u"Threshold", None))
+        self.resetButton.setText(QCoreApplication.translate("CubeControl", u"Reset Position/Rotation", None))
+    # retranslateUi
+
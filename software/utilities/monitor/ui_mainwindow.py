@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+################################################################################
+## Form generated from reading UI file 'main_window.ui'
+##
+## Created by: Qt User Interface Compiler version 6.12.0
+##
+## WARNING! All changes made in this file will be lost when recompiling UI file!
+################################################################################
+
+from PySide6.QtCore import (QCoreApplication, QDate, QDateTime, QLocale,
+    QMetaObject, QObject, QPoint, QRect,
+    QSize, QTime, QUrl, Qt)
+from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
+    QFont, QFontDatabase, QGradient, QIcon,
+    QImage, QKeySequence, QLinearGradient, QPainter,
+    QPalette, QPixmap, QRadialGradient, QTransform)
+from PySide6.QtWidgets import (QApplication, QComboBox, QFormLayout, QGridLayout,
+    QGroupBox, QHBoxLayout, QLabel, QMainWindow,
+    QPushButton, QSizePolicy, QSlider, QSpacerItem,
+    QTabWidget, QVBoxLayout, QWidget)
+
+from visualisers import (CubeControl, GlChannelPsd, GlChannelVoltage, NoiseWidget)
+import resources_rc
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        if not MainWindow.objectName():
+            MainWindow.setObjectName(u"MainWindow")
+        MainWindow.resize(785, 644)
+        self.centralWidget = QWidget(MainWindow)
+        self.centralWidget.setObjectName(u"centralWidget")
+        self.verticalLayout = QVBoxLayout(self.centralWidget)
+        self.verticalLayout.setObjectName(u"verticalLayout")
+        self.gridLayout = QGridLayout()
+        self.gridLayout.setObjectName(u"gridLayout")
+        self.serialConnectButton = QPushButton(self.centralWidget)
+        self.serialConnectButton.setObjectName(u"serialConnectButton")
+        self.serialConnectButton.setMinimumSize(QSize(0, 40))
+        icon = QIcon()
+        icon.addFile(u":/icons/connect", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
+        self.serialConnectButton.setIcon(icon)
+        self.serialConnectButton.setIconSize(QSize(32, 32))
+
+        self.gridLayout.addWidget(self.serialConnectButton, 1, 0, 1, 1)
+
+        self.groupBox_2 = QGroupBox(self.centralWidget)
+        self.groupBox_2.setObjectName(u"groupBox_2")
+        self.horizontalLayout = QHBoxLayout(self.groupBox_2)
+        self.horizontalLayout.setObjectName(u"horizontalLayout")
+        self.label = QLabel(self.groupBox_2)
+        self.label.setObjectName(u"label")
+
+        self.horizontalLayout.addWidget(self.label)
+
+        self.filterCutoffSlider = QSlider(self.groupBox_2)
+        self.filterCutoffSlider.setObjectName(u"filterCutoffSlider")
+        self.filterCutoffSlider.setValue(46)
+        self.filterCutoffSlider.setOrientation(Qt.Horizontal)
+
+        self.horizontalLayout.addWidget(self.filterCutoffSlider)
+
+        self.filterCutoffValue = QLabel(self.groupBox_2)
+        self.filterCutoffValue.setObjectName(u"filterCutoffValue")
+        self.filterCutoffValue.setMinimumSize(QSize(80, 0))
+        self.filterCutoffValue.setAlignment(Qt.AlignRight|Qt.AlignTrailing|Qt.AlignVCenter)
+
+        self.horizontalLayout.addWidget(self.filterCutoffValue)
+
+
+        self.gridLayout.addWidget(self.groupBox_2, 0, 4, 2, 1)
+
+        self.horizontalSpacer = QSpacerItem(40, 20, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum)
+
+        self.gridLayout.addItem(self.horizontalSpacer, 0, 2, 2, 1)
+
+        self.biasGroupBox = QGroupBox(self.centralWidget)
+        self.biasGroupBox.setObjectName(u"biasGroupBox")
+        self.biasGroupBox.setCheckable(True)
+        self.formLayout = QFormLayout(self.biasGroupBox)
+        self.formLayout.setObjectName(u"formLayout")
+        self.label_2 = QLabel(self.biasGroupBox)
+        self.label_2.setObjectName(u"label_2")
+
+        self.formLayout.setWidget(0, QFormLayout.ItemRole.LabelRole, self.label_2)
+
+        self.biasThresholdSlider = QSlider(self.biasGroupBox)
+        self.biasThresholdSlider.setObjectName(u"biasThresholdSlider")
+        self.biasThresholdSlider.setValue(25)
+        self.biasThresholdSlider.setOrientation(Qt.Horizontal)
+
+        self.formLayout.setWidget(0, QFormLayout.ItemRole.FieldRole, self.biasThresholdSlider)
+
+        self.label_3 = QLabel(self.biasGroupBox)
+        self.label_3.setObjectName(u"label_3")
+
+        self.formLayout.setWidget(1, QFormLayout.ItemRole.LabelRole, self.label_3)
+
+        self.biasTimeSlider = QSlider(self.biasGroupBox)
+        self.biasTimeSlider.setObjectName(u"biasTimeSlider")
+        self.biasTimeSlider.setOrientation(Qt.Horizontal)
+
+        self.formLayout.setWidget(1, QFormLayout.ItemRole.FieldRole, self.biasTimeSlider)
+
+
+        self.gridLayout.addWidget(self.biasGroupBox, 0, 3, 2, 1)
+
+        self.recordButton = QPushButton(self.centralWidget)
+        self.recordButton.setObjectName(u"recordButton")
+        sizePolicy = QSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.recordButton.sizePolicy().hasHeightForWidth())
+        self.recordButton.setSizePolicy(sizePolicy)
+        self.recordButton.setMinimumSize(QSize(40, 40))
+        icon1 = QIcon()
+        icon1.addFile(u":/icons/record", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
+        self.recordButton.setIcon(icon1)
+        self.recordButton.setIconSize(QSize(32, 32))
+        self.recordButton.setCheckable(True)
+
+        self.gridLayout.addWidget(self.recordButton, 1, 1, 1, 1)
+
+        self.serialPortCombo = QComboBox(self.centralWidget)
+        self.serialPortCombo.setObjectName(u"serialPortCombo")
+
+        self.gridLayout.addWidget(self.serialPortCombo, 0, 0, 1, 2)
+
+        self.gridLayout.setColumnStretch(0, 2)
+        self.gridLayout.setColumnStretch(1, 1)
+        self.gridLayout.setColumnStretch(3, 4)
+        self.gridLayout.setColumnStretch(4, 5)
+
+        self.verticalLayout.addLayout(self.gridLayout)
+
+        self.tabWidget = QTabWidget(self.centralWidget)
+        self.tabWidget.setObjectName(u"tabWidget")
+        self.tabWidget.setTabPosition(QTabWidget.South)
+        self.voltagePlot = GlChannelVoltage()
+        self.voltagePlot.setObjectName(u"voltagePlot")
+        self.tabWidget.addTab(self.voltagePlot, "")
+        self.psdTab = QWidget()
+        self.psdTab.setObjectName(u"psdTab")
+        self.verticalLayout_2 = QVBoxLayout(self.psdTab)
+        self.verticalLayout_2.setSpacing(0)
+        self.verticalLayout_2.setObjectName(u"verticalLayout_2")
+        self.verticalLayout_2.setContentsMargins(0, 0, 0, 0)
+        self.noiseWidget = NoiseWidget(self.psdTab)
+        self.noiseWidget.setObjectName(u"noiseWidget")
+
+        self.verticalLayout_2.addWidget(self.noiseWidget)
+
+        self.psdPlot = GlChannelPsd(self.psdTab)
+        self.psdPlot.setObjectName(u"psdPlot")
+        sizePolicy1 = QSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Expanding)
+        sizePolicy1.setHorizontalStretch(0)
+        sizePolicy1.setVerticalStretch(0)
+        sizePolicy1.setHeightForWidth(self.psdPlot.sizePolicy().hasHeightForWidth())
+        self.psdPlot.setSizePolicy(sizePolicy1)
+
+        self.verticalLayout_2.addWidget(self.psdPlot)
+
+        self.tabWidget.addTab(self.psdTab, "")
+        self.cubeControl = CubeControl()
+        self.cubeControl.setObjectName(u"cubeControl")
+        self.tabWidget.addTab(self.cubeControl, "")
+
+        self.verticalLayout.addWidget(self.tabWidget)
+
+        MainWindow.setCentralWidget(self.centralWidget)
+
+        self.retranslateUi(MainWindow)
+
+        self.tabWidget.setCurrentIndex(0)
+
+
+        QMetaObject.connectSlotsByName(MainWindow)
+    # setupUi
+
+    def retranslateUi(self, MainWindow):
+        MainWindow.setWindowTitle(QCoreApplication.translate("MainWindow", u"Haptick Monitor", None))
+        self.serialConnectButton.setText(QCoreApplication.translate("MainWindow", u"Connect", None))
+        self.groupBox_2.setTitle(QCoreApplication.translate("MainWindow", u"Low Pass Filter", None))
+        self.label.setText(QCoreApplication.translate("MainWindow", u"Cutoff", None))
+        self.filterCutoffValue.setText(QCoreApplication.translate("MainWindow", u"10.3 Hz", None))
+        self.biasGroupBox.setTitle(QCoreApplication.translate("MainWindow", u"Bias Correction", None))
+        self.label_2.setText(QCoreApplication.translate("MainWindow", u"Threshold", None))
+        self.label_3.setText(QCoreApplication.translate("MainWindow", u"Time", None))
+        self.recordButton.setText("")
+        self.tabWidget.setTabText(self.tabWidget.indexOf(self.voltagePlot), QCoreApplication.translate("MainWindow", u"Time Series", None))
+        self.tabWidget.setTabText(self.tabWidget.indexOf(self.psdTab), QCoreApplication.translate("MainWindow", u"Power Spectrum", None))
+        self.tabWidget.setTabText(self.tabWidget.indexOf(self.cubeControl), QCoreApplication.translate("MainWindow", u"Position", None))
+    # retranslateUi
+
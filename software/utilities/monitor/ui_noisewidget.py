@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+################################################################################
+## Form generated from reading UI file 'noise_widget.ui'
+##
+## Created by: Qt User Interface Compiler version 6.12.0
+##
+## WARNING! All changes made in this file will be lost when recompiling UI file!
+################################################################################
+
+from PySide6.QtCore import (QCoreApplication, QDate, QDateTime, QLocale,
+    QMetaObject, QObject, QPoint, QRect,
+    QSize, QTime, QUrl, Qt)
+from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
+    QFont, QFontDatabase, QGradient, QIcon,
+    QImage, QKeySequence, QLinearGradient, QPainter,
+    QPalette, QPixmap, QRadialGradient, QTransform)
+from PySide6.QtWidgets import (QApplication, QFrame, QGridLayout, QLabel,
+    QSizePolicy, QWidget)
+
+class Ui_NoiseWidget(object):
+    def setupUi(self, NoiseWidget):
+        if not NoiseWidget.objectName():
+            NoiseWidget.setObjectName(u"NoiseWidget")
+        NoiseWidget.resize(426, 74)
+        self.gridLayout = QGridLayout(NoiseWidget)
+        self.gridLayout.setObjectName(u"gridLayout")
+        self.channel_5 = QLabel(NoiseWidget)
+        self.channel_5.setObjectName(u"channel_5")
+        self.channel_5.setAlignment(Qt.AlignCenter)
+
+        self.gridLayout.addWidget(self.channel_5, 2, 4, 1, 1)
+
+        self.channel_6 = QLabel(NoiseWidget)
+        self.channel_6.setObjectName(u"channel_6")
+        self.channel_6.setAlignment(Qt.AlignCenter)
+
+        self.gridLayout.addWidget(self.channel_6, 2, 5, 1, 1)
+
+        self.channel_4 = QLabel(NoiseWidget)
+        self.channel_4.setObjectName(u"channel_4")
+        self.channel_4.setAlignment(Qt.AlignCenter)
+
+        self.gridLayout.addWidget(self.channel_4, 2, 3, 1, 1)
+
+        self.channel_2 = QLabel(NoiseWidget)
+        self.channel_2.setObjectName(u"channel_2")
+        self.channel_2.setAlignment(Qt.AlignCenter)
+
+        self.gridLayout.addWidget(self.channel_2, 2, 1, 1, 1)
+
+        self.label = QLabel(NoiseWidget)
+        self.label.setObjectName(u"label")
+        font = QFont()
+        font.setPointSize(14)
+        font.setBold(True)
+        self.label.setFont(font)
+        self.label.setAlignment(Qt.AlignCenter)
+
+        self.gridLayout.addWidget(self.label, 0, 0, 1, 6)
+
+        self.channel_1 = QLabel(NoiseWidget)
+        self.channel_1.setObjectName(u"channel_1")
+        self.channel_1.setAlignment(Qt.AlignCenter)
+
+        self.gridLayout.addWidget(self.channel_1, 2, 0, 1, 1)
+
+        self.channel_3 = QLabel(NoiseWidget)
+        self.channel_3.setObjectName(u"channel_3")
+        self.channel_3.setAlignment(Qt.AlignCenter)
+
+        self.gridLayout.addWidget(self.channel_3, 2, 2, 1, 1)
+
+        self.line = QFrame(NoiseWidget)
+        self.line.setObjectName(u"line")
+        self.line.setFrameShape(QFrame.Shape.HLine)
+        self.line.setFrameShadow(QFrame.Shadow.Sunken)
+
+        self.gridLayout.addWidget(self.line, 1, 0, 1, 6)
+
+
+        self.retranslateUi(NoiseWidget)
+
+        QMetaObject.connectSlotsByName(NoiseWidget)
+    # setupUi
+
+    def retranslateUi(self, NoiseWidget):
+        NoiseWidget.setWindowTitle(QCoreApplication.translate("NoiseWidget", u"Form", None))
+        self.channel_5.setText(QCoreApplication.translate("NoiseWidget", u"0.00 uV", None))
+        self.channel_6.setText(QCoreApplication.translate("NoiseWidget", u"0.00 uV", None))
+        self.channel_4.setText(QCoreApplication.translate("NoiseWidget", u"0.00 uV", None))
+        self.channel_2.setText(QCoreApplication.translate("NoiseWidget", u"0.00 uV", None))
+        self.label.setText(QCoreApplication.translate("NoiseWidget", u"RMS Noise", None))
+        self.channel_1.setText(QCoreApplication.translate("NoiseWidget", u"0.00 uV", None))
+        self.channel_3.setText(QCoreApplication.translate("NoiseWidget", u"0.00 uV", None))
+    # retranslateUi
+
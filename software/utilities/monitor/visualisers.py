@@ -1,93 +1,373 @@
-from matplotlib.backends.backend_qtagg import FigureCanvas
-from matplotlib.figure import Figure
 import numpy as np
-from PySide6.QtWidgets import QWidget
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QScrollBar, QSlider, QLabel
 from PySide6.QtOpenGLWidgets import QOpenGLWidget
-from PySide6.QtGui import QSurfaceFormat
-import moderngl
-from pywavefront import Wavefront
-from pyrr import Matrix44
-from scipy.spatial.transform import Rotation
-from PIL import Image
+from PySide6.QtGui import QSurfaceFormat, QImage, QPainter, QColor, QPixmap
+from PySide6.QtCore import Qt, QRectF, QPointF, Signal
 from ui_noisewidget import Ui_NoiseWidget
-from si_prefix import si_format
+from si_prefix import si_format, si_parse
 from pathlib import Path
+from functools import cached_property
+from lazy import lazy_import
+
+# These are slow to import and only needed once a widget is actually shown, so
+# they're imported on first use to get the window up quickly.
+moderngl = lazy_import("moderngl")
+pyrr = lazy_import("pyrr")
+spatial = lazy_import("scipy.spatial")
+signal = lazy_import("scipy.signal")
+Image = lazy_import("PIL.Image")
+
+from calibration import Calibration
+
+
+def __getattr__(name):
+    # The matplotlib plots live in their own module so importing this one
+    # doesn't pull in matplotlib.
+    if name in ("MplCanvas", "ChannelVoltage", "ChannelPsd"):
+        import mpl_visualisers
+        return getattr(mpl_visualisers, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class GlPlot(QOpenGLWidget):
+    # Base for plots drawn with OpenGL. The axes, ticks and labels are painted
+    # once into an overlay texture whenever the widget is resized, so each
+    # frame only has to draw the data and blend the cached overlay on top.
+    #
+    # Not used directly: subclasses give the VERTEX_SHADER for their data and
+    # a render method that draws it into the plot area. Drawing goes through
+    # draw with any moderngl framebuffer, so benchmark_render.py can time it
+    # without a window.
+    MARGINS = (70, 10, 15, 45)
+    COLOURS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b"]
+    # Multisampling more than doubles the cost of the strip chart's thousands
+    # of line segments under Mesa's software rasteriser, taking it past the
+    # frame budget, and buys little at one or two pixels per bucket.
+    SAMPLES = 0
 
-# Hackish way of importing my free body code without releasing a package
-import sys
-import pathlib
-parent = pathlib.Path(__file__).parent.resolve()
-sys.path.append(str(parent / "../force_analysis/"))
-import free_body
+    def __init__(self, parent=None):
+        super().__init__(parent)
 
+        format = QSurfaceFormat()
+        format.setVersion(3, 3)
+        format.setProfile(QSurfaceFormat.CoreProfile)
+        format.setSamples(self.SAMPLES)
+        self.setFormat(format)
 
-class MplCanvas(FigureCanvas):
-    def __init__(self, parent=None):
-        super().__init__(Figure())
-        
-        # Set figure and canvas background to be transparent
-        self.figure.patch.set_facecolor('None')
-        self.setStyleSheet("background-color: transparent;")
-    
-    def resizeEvent(self, event):
-        super().resizeEvent(event)
-        self.figure.tight_layout()
+        self.ctx = None
+        self.xlim = (0.0, 1.0)
+        self.ylim = (0.0, 1.0)
+        self.xlabel = ""
+        self.ylabel = ""
+        self.changed = False
+        self._overlay = None
+        self._overlay_stale = True
+
+    def render_frame(self):
+        self.update()
+
+    def set_xlim(self, xlim):
+        if xlim != self.xlim:
+            self.xlim = xlim
+            self._overlay_stale = True
+            self.changed = True
+
+    def resizeGL(self, width, height):
+        self._overlay_stale = True
+
+    def paintGL(self):
+        if self.ctx is None:
+            self.init(moderngl.create_context())
+        self.draw(self.ctx.detect_framebuffer(self.defaultFramebufferObject()))
+
+    def draw(self, fbo):
+        if self._overlay_stale:
+            self._overlay = self._paint_overlay()
+            self._overlay_stale = False
+
+        fbo.use()
+        colour = self.palette().window().color()
+        self.ctx.clear(colour.redF(), colour.greenF(), colour.blueF(), 1.0)
+
+        ratio = self.devicePixelRatio()
+        left, top, right, bottom = (int(m * ratio) for m in self.MARGINS)
+        width, height = int(self.width() * ratio), int(self.height() * ratio)
+        self.ctx.viewport = (left, bottom, max(width - left - right, 1), max(height - top - bottom, 1))
+        self.render()
+
+        self.ctx.viewport = (0, 0, width, height)
+        self.ctx.enable(moderngl.BLEND)
+        self.ctx.blend_func = moderngl.ONE, moderngl.ONE_MINUS_SRC_ALPHA
+        self._overlay.use()
+        self.overlay_vao.render(moderngl.TRIANGLE_STRIP)
+        self.ctx.disable(moderngl.BLEND)
+
+    def init(self, ctx):
+        self.ctx = ctx
+        self.overlay_prog = self.ctx.program(
+            vertex_shader='''
+                #version 330
+                in vec2 in_position;
+                out vec2 v_text;
+                void main() {
+                    v_text = vec2(in_position.x + 1.0, 1.0 - in_position.y) / 2.0;
+                    gl_Position = vec4(in_position, 0.0, 1.0);
+                }
+            ''',
+            fragment_shader='''
+                #version 330
+                uniform sampler2D Texture;
+                in vec2 v_text;
+                out vec4 f_color;
+                void main() {
+                    f_color = texture(Texture, v_text);
+                }
+            ''',
+        )
+        quad = np.array([-1.0, -1.0, 1.0, -1.0, -1.0, 1.0, 1.0, 1.0], dtype=np.float32)
+        self.overlay_vbo = self.ctx.buffer(quad)
+        self.overlay_vao = self.ctx.vertex_array(self.overlay_prog, [(self.overlay_vbo, '2f', 'in_position')])
 
+        self.line_prog = self.ctx.program(
+            vertex_shader=self.VERTEX_SHADER,
+            fragment_shader='''
+                #version 330
+                uniform vec3 Color;
+                out vec4 f_color;
+                void main() {
+                    f_color = vec4(Color, 1.0);
+                }
+            ''',
+        )
+        self.colour = self.line_prog['Color']
+
+    def _paint_overlay(self):
+        ratio = self.devicePixelRatio()
+        image = QImage(int(self.width() * ratio), int(self.height() * ratio), QImage.Format_RGBA8888_Premultiplied)
+        image.setDevicePixelRatio(ratio)
+        image.fill(Qt.transparent)
+
+        left, top, right, bottom = self.MARGINS
+        plot = QRectF(left, top, self.width() - left - right, self.height() - top - bottom)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(self.palette().windowText().color())
+        metrics = painter.fontMetrics()
+
+        for value, label in _ticks(*self.xlim):
+            x = plot.left() + (value - self.xlim[0]) / (self.xlim[1] - self.xlim[0]) * plot.width()
+            painter.drawLine(QPointF(x, plot.bottom()), QPointF(x, plot.bottom() + 4))
+            width = max(80, metrics.horizontalAdvance(label) + 8)
+            painter.drawText(QRectF(x - width / 2, plot.bottom() + 6, width, metrics.height()), Qt.AlignHCenter, label)
+        for value, label in _ticks(*self.ylim):
+            y = plot.bottom() - (value - self.ylim[0]) / (self.ylim[1] - self.ylim[0]) * plot.height()
+            painter.drawLine(QPointF(plot.left() - 4, y), QPointF(plot.left(), y))
+            painter.drawText(QRectF(0, y - metrics.height() / 2, plot.left() - 6, metrics.height()), Qt.AlignRight | Qt.AlignVCenter, label)
+
+        painter.drawRect(plot)
+        painter.drawText(QRectF(plot.left(), self.height() - metrics.height() - 2, plot.width(), metrics.height()), Qt.AlignHCenter, self.xlabel)
+        painter.translate(2, plot.center().y())
+        painter.rotate(-90)
+        painter.drawText(QRectF(-plot.height() / 2, 0, plot.height(), metrics.height()), Qt.AlignHCenter, self.ylabel)
+        painter.end()
+
+        texture = self.ctx.texture((image.width(), image.height()), 4, bytes(image.constBits()))
+        if self._overlay is not None:
+            self._overlay.release()
+        return texture
+
+
+def _ticks(low, high, count=6):
+    # Round numbered ticks (1, 2 or 5 times a power of ten) within the range.
+    step = (high - low) / count
+    magnitude = 10.0 ** np.floor(np.log10(step))
+    step = next(m * magnitude for m in (1.0, 2.0, 5.0, 10.0) if m * magnitude >= step)
+    values = np.arange(np.ceil(low / step), np.floor(high / step) + 1) * step
+
+    return [(value, _tick_label(value, step)) for value in values]
+
+
+def _tick_label(value, step):
+    # Use the fewest decimal places that still represent the tick exactly.
+    # Zoomed in far from zero, say late in a long recording, that can take a
+    # digit for every decade between the tick and the step.
+    digits = int(np.ceil(np.log10(max(abs(value), step) / step)))
+    for precision in range(digits + 4):
+        label = si_format(value + 0.0, precision=precision).replace(" ", "")
+        if abs(si_parse(label) - value) < 1e-3 * step:
+            break
+    return label
+
+
+class GlChannelVoltage(GlPlot):
+    # Strip chart of the last four seconds for every channel. Samples are
+    # reduced to a min/max envelope over small buckets (more than enough
+    # resolution for any sensible plot width), and the envelope lives in a ring
+    # buffer on the GPU so only newly completed buckets are uploaded. Each
+    # channel's ring has one extra bucket that mirrors bucket zero so the line
+    # strip joins up across the wrap.
+    BUCKET = 8
+    BUCKETS = 1953
+    VERTEX_SHADER = '''
+        #version 330
+        uniform int Buckets;
+        uniform int Head;
+        uniform vec2 Range;
+        in float in_value;
+        void main() {
+            int vertex = gl_VertexID % (2 * (Buckets + 1));
+            int age = (vertex / 2 - Head + Buckets) % Buckets;
+            float x = (float(age) + 0.5 * float(vertex % 2)) / float(Buckets) * 2.0 - 1.0;
+            float y = (in_value - Range.x) / (Range.y - Range.x) * 2.0 - 1.0;
+            gl_Position = vec4(x, y, 0.0, 1.0);
+        }
+    '''
+
+    LIVE_XLIM = (-BUCKETS * BUCKET * 256e-6, 0.0)
 
-class ChannelVoltage(MplCanvas):
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.xlim = self.LIVE_XLIM
+        self.ylim = (-50e-6, 50e-6)
+        self.xlabel = "Time (s)"
+        self.ylabel = "Voltage (V)"
+
+        self._ring = np.zeros((6, 2 * (self.BUCKETS + 1)), dtype=np.float32)
+        self._head = 0
+        self._partial = np.zeros((0, 6), dtype=np.float32)
+        self._dirty = [(0, self.BUCKETS + 1)]
 
-        # Add some axes
-        self.axes = self.figure.add_subplot(111)
-        self.axes.set_ylabel("Voltage (V)")
-        self.axes.set_ylim(-50e-6, 50e-6)
-        self.axes.set_xlabel("Time (s)")
-        self.axes.set_xlim(-4.0, 0.0)
-
-        # Let's plot something
-        self.x_data = np.linspace(-4 + 256e-6, 0.0, 15625)
-        self.y_data = np.zeros((15625, 6))
-        self.lines = self.axes.plot(self.x_data, self.y_data)
-    
     def add_values(self, values):
-        value_count = len(values)
-        prev_x = self.x_data[-1]
-        self.y_data = np.roll(self.y_data, -value_count, axis=0)
-        self.x_data = np.roll(self.x_data, -value_count, axis=0)
-        self.y_data[-value_count:, :] = values[-self.y_data.shape[0]:]
-        self.x_data[-value_count:] = np.linspace(prev_x + 256e-6, prev_x + 256e-6 + (value_count - 1) * 256e-6, value_count)[-self.x_data.shape[0]:]
-        if self.isVisible():
-            for line, d in zip(self.lines, self.y_data.T):
-                line.set_ydata(d)
-                line.set_xdata(self.x_data)
-            self.axes.set_xlim(self.x_data[0], self.x_data[-1])
-            self.draw()
-
-
-class ChannelPsd(MplCanvas):
+        # Back to live data if we were showing part of a recording.
+        self.set_xlim(self.LIVE_XLIM)
+
+        # Only complete buckets are drawn, the remainder waits for the next
+        # batch.
+        values = np.concatenate((self._partial, np.nan_to_num(values)))
+        complete = len(values) // self.BUCKET * self.BUCKET
+        self._partial = values[complete:]
+        buckets = values[:complete].reshape(-1, self.BUCKET, 6)[-self.BUCKETS:]
+        envelope = np.stack((buckets.min(axis=1), buckets.max(axis=1)), axis=1)
+
+        first = min(len(envelope), self.BUCKETS - self._head)
+        self._store(self._head, envelope[:first])
+        self._store(0, envelope[first:])
+        self._head = (self._head + len(envelope)) % self.BUCKETS
+        if len(envelope):
+            self.changed = True
+
+    def show_envelope(self, minimum, maximum, xlim):
+        # Replace the whole chart with an envelope of BUCKETS rows computed
+        # elsewhere (e.g. from a recording) spanning xlim.
+        self._head = 0
+        self._partial = np.zeros((0, 6), dtype=np.float32)
+        self._store(0, np.stack((np.nan_to_num(minimum), np.nan_to_num(maximum)), axis=1))
+        self.set_xlim(xlim)
+        self.changed = True
+
+    def _store(self, start, envelope):
+        if len(envelope) == 0:
+            return
+        end = start + len(envelope)
+        self._ring[:, 2 * start:2 * end] = envelope.reshape(-1, 6).T
+        self._dirty.append((start, end))
+        if start == 0:
+            self._ring[:, -2:] = self._ring[:, :2]
+            self._dirty.append((self.BUCKETS, self.BUCKETS + 1))
+
+    def init(self, ctx):
+        super().init(ctx)
+        self.vbo = self.ctx.buffer(reserve=self._ring.nbytes)
+        self.vao = self.ctx.vertex_array(self.line_prog, [(self.vbo, '1f', 'in_value')])
+        self.line_prog['Buckets'].value = self.BUCKETS
+        self.line_prog['Range'].value = self.ylim
+        self._dirty = [(0, self.BUCKETS + 1)]
+
+    def render(self):
+        # Upload whatever has changed since the last frame. While hidden the
+        # dirty list can grow long, at which point one full upload is cheaper.
+        if sum(end - start for start, end in self._dirty) >= self.BUCKETS:
+            self.vbo.write(self._ring.tobytes())
+        else:
+            stride = self._ring.shape[1]
+            for start, end in self._dirty:
+                for channel, ring in enumerate(self._ring):
+                    self.vbo.write(ring[2 * start:2 * end].tobytes(), offset=(channel * stride + 2 * start) * 4)
+        self._dirty = []
+
+        self.line_prog['Head'].value = self._head
+        for channel, colour in enumerate(self.COLOURS):
+            self.colour.value = QColor(colour).getRgbF()[:3]
+            base = channel * 2 * (self.BUCKETS + 1)
+            if self._head == 0:
+                self.vao.render(moderngl.LINE_STRIP, vertices=2 * self.BUCKETS, first=base)
+            else:
+                self.vao.render(moderngl.LINE_STRIP, vertices=2 * (self.BUCKETS + 1 - self._head), first=base + 2 * self._head)
+                self.vao.render(moderngl.LINE_STRIP, vertices=2 * self._head, first=base)
+
+
+class GlChannelPsd(GlPlot):
+    # Power spectral density of the last 1024 samples, estimated the same way
+    # as matplotlib's psd (256 point Hann segments, no overlap or detrending).
+    LENGTH = 1024
+    SEGMENT = 256
+    VERTEX_SHADER = '''
+        #version 330
+        uniform vec2 Domain;
+        uniform vec2 Range;
+        in vec2 in_position;
+        void main() {
+            vec2 position = (in_position - vec2(Domain.x, Range.x)) / vec2(Domain.y - Domain.x, Range.y - Range.x);
+            gl_Position = vec4(position * 2.0 - 1.0, 0.0, 1.0);
+        }
+    '''
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.xlim = (0.0, 0.5 / 256e-6)
+        self.ylim = (-300.0, -100.0)
+        self.xlabel = "Frequency (Hz)"
+        self.ylabel = "Power Spectral Density (dB/Hz)"
 
-        # Add some axes
-        self.axes = self.figure.add_subplot(111)
+        self.data = (np.random.rand(self.LENGTH, 6) * 1.2e-6).astype(np.float32)
+        self._points = np.zeros((6, self.SEGMENT // 2 + 1, 2), dtype=np.float32)
+        self._points[..., 0] = np.fft.rfftfreq(self.SEGMENT, 256e-6)
 
-        # Plot something
-        self.axes.set_ylim(-300.0, -100.0)
-        self.data = np.random.rand(1024, 6) * 1.2e-6
-        for d in self.data.T:
-            self.axes.psd(d, Fs=1/256e-6)
-    
     def add_values(self, values):
+        if len(self.data) != self.LENGTH:
+            self.data = np.zeros((self.LENGTH, 6), dtype=np.float32)
         value_count = len(values)
         self.data = np.roll(self.data, -value_count, axis=0)
         self.data[-value_count:, :] = values[-self.data.shape[0]:]
-        if self.isVisible():
-            self.axes.clear()
-            self.axes.set_ylim(-300.0, -100.0)
-            for d in self.data.T:
-                self.axes.psd(d, Fs=1/256e-6)
-            self.draw()
+        self.changed = True
+
+    def show_samples(self, samples):
+        # Estimate the spectrum from any number of samples (at least a segment
+        # is needed, so short inputs are zero padded).
+        samples = np.asarray(samples, dtype=np.float32)
+        if len(samples) < self.SEGMENT:
+            samples = np.vstack((samples, np.zeros((self.SEGMENT - len(samples), 6), dtype=np.float32)))
+        self.data = samples
+        self.changed = True
+
+    def init(self, ctx):
+        super().init(ctx)
+        self.vbo = self.ctx.buffer(reserve=self._points.nbytes)
+        self.vao = self.ctx.vertex_array(self.line_prog, [(self.vbo, '2f', 'in_position')])
+        self.line_prog['Domain'].value = self.xlim
+        self.line_prog['Range'].value = self.ylim
+
+    def render(self):
+        _, psd = signal.welch(np.nan_to_num(self.data), fs=1/256e-6, window='hann', nperseg=self.SEGMENT,
+                       noverlap=0, detrend=False, axis=0)
+        with np.errstate(divide='ignore'):
+            self._points[..., 1] = np.maximum(10.0 * np.log10(psd.T), self.ylim[0] - 100.0)
+        self.vbo.write(self._points.tobytes())
+
+        points = self._points.shape[1]
+        for channel, colour in enumerate(self.COLOURS):
+            self.colour.value = QColor(colour).getRgbF()[:3]
+            self.vao.render(moderngl.LINE_STRIP, vertices=points, first=channel * points)
 
 
 class NoiseWidget(QWidget):
@@ -104,19 +384,24 @@ class NoiseWidget(QWidget):
             self.ui.channel_6
         ]
 
-        self.data = np.zeros((4096, 6))
+        self.data = np.zeros((4096, 6), dtype=np.float32)
+        self.changed = False
     
     def add_values(self, values):
         value_count = len(values)
         self.data = np.roll(self.data, -value_count, axis=0)
         self.data[-value_count:, :] = values[-self.data.shape[0]:]
-        if self.isVisible():
-            rms = np.std(self.data, axis=0)
-            for label, value in zip(self._channel_labels, rms):
-                if np.isnan(value):
-                    label.setText("")
-                else:
-                    label.setText(f"{si_format(value, precision=2)}V")
+        self.changed = True
+    
+    def render_frame(self):
+        self.show_rms(np.std(self.data, axis=0, dtype=np.float64))
+    
+    def show_rms(self, rms):
+        for label, value in zip(self._channel_labels, rms):
+            if np.isnan(value):
+                label.setText("")
+            else:
+                label.setText(f"{si_format(value, precision=2)}V")
 
 
 class CubeDisplay(QOpenGLWidget):
@@ -130,17 +415,21 @@ class CubeDisplay(QOpenGLWidget):
         self.setFormat(format)
 
         self.ctx = None
-
-        self.scene = Wavefront(Path(__file__).parent / 'assets' / 'cube.obj')
-
-        self.desk_to_eye = Rotation.from_euler('ZX', [3.0 * np.pi / 4.0, -np.pi / 4.0])
+        self.changed = False
 
         self._translation = np.zeros(3)
-        self._rotation = Rotation.from_rotvec([0.0, 0.0, 0.0])
+        self._rotation = None
+    
+    @cached_property
+    def desk_to_eye(self):
+        return spatial.transform.Rotation.from_euler('ZX', [3.0 * np.pi / 4.0, -np.pi / 4.0])
     
     def update_cube(self, translation, rotation):
         self._translation = translation
         self._rotation = rotation
+        self.changed = True
+    
+    def render_frame(self):
         self.update()
     
     def paintGL(self):
@@ -195,7 +484,8 @@ class CubeDisplay(QOpenGLWidget):
         self.color = self.prog['Color']
         self.mvp = self.prog['Mvp']
 
-        self.vbo = self.ctx.buffer(np.array(self.scene.materials['Material'].vertices, dtype=np.float32))
+        vertices, texture = load_cube(Path(__file__).parent / 'assets' / 'cube.obj')
+        self.vbo = self.ctx.buffer(vertices)
         self.vao = self.ctx.vertex_array(
             self.prog,
             [
@@ -203,24 +493,22 @@ class CubeDisplay(QOpenGLWidget):
             ],
         )
 
-        texture_path = Path(__file__).parent / 'assets' / self.scene.materials['Material'].texture.image_name
-        with Image.open(texture_path) as im:
-            im = im.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
-            self.texture = self.ctx.texture(im.size, 4, im.tobytes())
+        self.texture = self.ctx.texture((texture.shape[1], texture.shape[0]), 4, texture.tobytes())
 
     def render(self):
         self.ctx.clear(1.0, 1.0, 1.0, 1.0)
         self.ctx.enable(moderngl.DEPTH_TEST)
 
-        proj = Matrix44.perspective_projection(45.0, self.width() / self.height(), 0.1, 1000.0)
-        lookat = Matrix44.look_at(
+        proj = pyrr.Matrix44.perspective_projection(45.0, self.width() / self.height(), 0.1, 1000.0)
+        lookat = pyrr.Matrix44.look_at(
             (4.0, 4.0, 4.0),
             (0.0, 0.0, 0.0),
             (0.0, 0.0, 1.0),
         )
 
-        translate = Matrix44.from_translation(self._translation)
-        rotate = Matrix44.from_quaternion(self._rotation.inv().as_quat())
+        quaternion = [0.0, 0.0, 0.0, 1.0] if self._rotation is None else self._rotation.inv().as_quat()
+        translate = pyrr.Matrix44.from_translation(self._translation)
+        rotate = pyrr.Matrix44.from_quaternion(quaternion)
 
         self.light.write(((translate * rotate) @ np.array([[4.0], [1.0], [6.0], [1.0]]))[:3].astype('f4'))
         self.color.value = (1.0, 1.0, 1.0, 0.25)
@@ -230,6 +518,41 @@ class CubeDisplay(QOpenGLWidget):
         self.vao.render()
 
 
+def load_cube(path):
+    # Parsing the OBJ file is slow, so the interleaved vertices and the RGBA
+    # texture are kept in a binary bundle next to it. The bundle is rebuilt
+    # whenever any of its source files change.
+    cache = path.with_suffix('.cache.npz')
+    try:
+        with np.load(cache) as bundle:
+            sources = [path.parent / str(name) for name in bundle['sources']]
+            if str(bundle['key']) == _source_key(sources):
+                return bundle['vertices'], bundle['texture']
+    except (OSError, KeyError, ValueError):
+        pass
+
+    from pywavefront import Wavefront
+    scene = Wavefront(path)
+    material = scene.materials['Material']
+    vertices = np.array(material.vertices, dtype=np.float32)
+    with Image.open(path.parent / material.texture.image_name) as im:
+        texture = np.asarray(im.convert('RGBA').transpose(Image.Transpose.FLIP_TOP_BOTTOM))
+
+    sources = [path.name, *scene.mtllibs, material.texture.image_name]
+    try:
+        with open(cache, 'wb') as f:
+            np.savez(f, vertices=vertices, texture=texture, sources=sources,
+                     key=_source_key([path.parent / name for name in sources]))
+    except OSError:
+        pass
+    return vertices, texture
+
+
+def _source_key(paths):
+    stats = [path.stat() for path in paths]
+    return ";".join(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}" for path, stat in zip(paths, stats))
+
+
 from ui_cubecontrol import Ui_CubeControl
 
 
@@ -245,56 +568,83 @@ class CubeControl(QWidget):
         self.ui.translationSlider.valueChanged.connect(self._change_translation_sensitivity)
         self.ui.rotationSlider.valueChanged.connect(self._change_rotation_sensitivity)
 
-        # Create a free body Haptick to be able to calculate forces and torques
-        separation = 2 * np.pi * 25e-3 * 25.0 / 360.0
-        self._haptick = free_body.Haptick(25e-3, separation, 25e-3, separation, 20e-3)
+        # Forces and torques come from the free body model until a device
+        # calibration is set.
+        self.set_calibration(Calibration.ideal())
+
+        # Rotations are set up by _setup once they're needed, to keep scipy
+        # out of startup.
+        self._haptick_to_desk = None
+
+        # Default thresholds and sensitivities
+        self._threshold = 1.0e-6
+        self._translation_sensitivity = 1.2e6
+        self._rotation_sensitivity = 1.2e7
+    
+    def set_calibration(self, calibration):
+        # The sensitivities were tuned for the ideal model, so calibrated
+        # wrenches are scaled to similar magnitudes.
+        self._calibration = calibration
+        self._wrench_scale = calibration.scale
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._setup()
+    
+    def _setup(self):
+        if self._haptick_to_desk is not None:
+            return
 
         # Create a rotation that takes vectors from Haptick space to real desk
         # space. Haptick space has the positive x-axis going into the screen and
         # the positive y-axis going directly left. Desk space has the positive
         # x-axis going directly right, and the positive y-axis going directly
         # into the screen. Both are right-handed coordinate systems.
-        self._haptick_to_desk = Rotation.from_rotvec([0.0, 0.0, np.pi / 2])
+        self._haptick_to_desk = spatial.transform.Rotation.from_rotvec([0.0, 0.0, np.pi / 2])
 
         # Start at no translation or rotation
         self._reset_position_rotation()
-
-        # Default thresholds and sensitivities
-        self._threshold = 1.0e-6
-        self._translation_sensitivity = 1.2e6
-        self._rotation_sensitivity = 1.2e7
     
     def add_values(self, values):
-        # Get the most recent arm forces. Base arm index 0 and 1 should be
-        # immediately either side of the positive x-axis, and indices should
-        # increase with increasing geometric angle.
-        arm_forces = np.roll(-values[-1], 1)
+        # There's no cube to move until we've been shown.
+        if self._haptick_to_desk is None:
+            return
 
+        # We know Haptick uses a constant sampling rate, so the elapsed time
+        # since the last batch of samples is the sampling period times the
+        # number of samples.
+        self._move(values[-1], len(values) * 256e-6)
+    
+    def replay(self, values, period):
+        # Move the cube from its starting position through a sequence of arm
+        # voltages (e.g. means over a recording), each held for period seconds.
+        self._setup()
+        self._reset_position_rotation()
+        for value in values:
+            self._move(value, period)
+    
+    def _move(self, value, time):
         # Bail if the values we get aren't large enough.
-        if np.all(np.abs(arm_forces) < self._threshold):
+        if np.all(np.abs(value) < self._threshold):
             return
         
-        if np.any(np.isnan(arm_forces)):
+        if np.any(np.isnan(value)):
             return
 
-        # Use the free body model to calculate the force and torque applied to
-        # the platform.
-        force, torque = self._haptick.applied(arm_forces)
-
-        # We know Haptick uses a constant sampling rate, so the elapsed time
-        # since the last batch of samples is the sampling period times the
-        # number of samples.
-        time = len(values) * 256e-6
+        # Use the calibration to calculate the force and torque applied to the
+        # platform.
+        wrench = self._calibration.wrench(value) * self._wrench_scale
+        force, torque = wrench[:3], wrench[3:]
 
         # Calculate the translation and rotation from the applied forces and
         # torques. We make linear velocity directly proportional to the force
         # and rotational velocity directly proportional to the torque.
         linear_velocity = self._haptick_to_desk.apply(
-            force[:, 0] * self._translation_sensitivity)
+            force * self._translation_sensitivity)
         rotational_velocity = self._haptick_to_desk.apply(
-            torque[:, 0] * self._rotation_sensitivity)
+            torque * self._rotation_sensitivity)
         self._translation += self.ui.cubeDisplay.desk_to_eye.apply(linear_velocity * time)
-        self._rotation = Rotation.from_rotvec(self.ui.cubeDisplay.desk_to_eye.apply(rotational_velocity * time)) * self._rotation
+        self._rotation = spatial.transform.Rotation.from_rotvec(self.ui.cubeDisplay.desk_to_eye.apply(rotational_velocity * time)) * self._rotation
 
         # Update the display
         self.ui.cubeDisplay.update_cube(self._translation, self._rotation)
@@ -307,7 +657,7 @@ class CubeControl(QWidget):
     
     def _reset_position_rotation(self):
         self._translation = np.zeros(3)
-        self._rotation = Rotation.from_rotvec([0.0, 0.0, 0.0])
+        self._rotation = spatial.transform.Rotation.from_rotvec([0.0, 0.0, 0.0])
         self.ui.cubeDisplay.update_cube(self._translation, self._rotation)
     
     def _change_threshold(self, value):
@@ -317,4 +667,141 @@ class CubeControl(QWidget):
         self._rotation_sensitivity = value * 1.2e6
 
     def _change_translation_sensitivity(self, value):
-        self._translation_sensitivity = value * 1.2e5
\ No newline at end of file
+        self._translation_sensitivity = value * 1.2e5
+
+
+class PlaybackControl(QWidget):
+    # Scrolling and zooming through a Recording. The overview shows the whole
+    # recording with the current selection highlighted, and selectionChanged
+    # is emitted with the selected range of samples whenever it moves.
+    MIN_WINDOW = 0.1
+
+    selectionChanged = Signal(int, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.recording = None
+
+        self.overview = RecordingOverview(self)
+        self.overview.clicked.connect(self._centre)
+        self.scrollbar = QScrollBar(Qt.Horizontal, self)
+        self.scrollbar.valueChanged.connect(self._emit_selection)
+        self.zoom = QSlider(Qt.Horizontal, self)
+        self.zoom.setRange(0, 1000)
+        self.zoom.valueChanged.connect(self._update_window)
+        self.label = QLabel(self)
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Zoom", self))
+        controls.addWidget(self.zoom, 1)
+        controls.addWidget(self.label, 2)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.overview)
+        layout.addWidget(self.scrollbar)
+        layout.addLayout(controls)
+
+    def set_recording(self, recording):
+        self.recording = recording
+        self.overview.set_recording(recording)
+        self.zoom.blockSignals(True)
+        self.zoom.setValue(0)
+        self.zoom.blockSignals(False)
+        self._update_window()
+
+    def selection(self):
+        start = self.scrollbar.value()
+        return start, min(start + self.scrollbar.pageStep(), len(self.recording))
+
+    def _window(self):
+        # Zoom runs logarithmically from the whole recording down to
+        # MIN_WINDOW seconds.
+        longest = len(self.recording)
+        shortest = min(int(self.MIN_WINDOW / self.recording.PERIOD), longest)
+        fraction = self.zoom.value() / self.zoom.maximum()
+        return int(round(longest * (shortest / longest) ** fraction))
+
+    def _update_window(self):
+        if self.recording is None:
+            return
+        centre = self.scrollbar.value() + self.scrollbar.pageStep() // 2
+        window = self._window()
+        self.scrollbar.blockSignals(True)
+        self.scrollbar.setRange(0, len(self.recording) - window)
+        self.scrollbar.setPageStep(window)
+        self.scrollbar.setSingleStep(max(window // 10, 1))
+        self.scrollbar.setValue(centre - window // 2)
+        self.scrollbar.blockSignals(False)
+        self._emit_selection()
+
+    def _centre(self, fraction):
+        self.scrollbar.setValue(int(fraction * len(self.recording)) - self.scrollbar.pageStep() // 2)
+
+    def _emit_selection(self):
+        start, stop = self.selection()
+        period = self.recording.PERIOD
+        self.label.setText(f"{start * period:.2f} s to {stop * period:.2f} s of {self.recording.duration:.1f} s")
+        self.overview.set_selection(start, stop)
+        self.selectionChanged.emit(start, stop)
+
+
+class RecordingOverview(QWidget):
+    # Envelope of a whole recording, drawn once per resize and cached.
+    clicked = Signal(float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(60)
+        self._recording = None
+        self._selection = (0, 0)
+        self._pixmap = None
+
+    def set_recording(self, recording):
+        self._recording = recording
+        self._pixmap = None
+        self.update()
+
+    def set_selection(self, start, stop):
+        self._selection = (start, stop)
+        self.update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._pixmap = None
+
+    def mousePressEvent(self, event):
+        self.clicked.emit(event.position().x() / self.width())
+
+    def mouseMoveEvent(self, event):
+        self.clicked.emit(event.position().x() / self.width())
+
+    def paintEvent(self, event):
+        if self._recording is None:
+            return
+        if self._pixmap is None:
+            self._pixmap = self._paint_envelope()
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._pixmap)
+        length = len(self._recording)
+        left = self._selection[0] / length * self.width()
+        right = self._selection[1] / length * self.width()
+        colour = self.palette().highlight().color()
+        colour.setAlpha(80)
+        painter.fillRect(QRectF(left, 0, max(right - left, 1), self.height()), colour)
+        painter.end()
+
+    def _paint_envelope(self):
+        pixmap = QPixmap(self.size())
+        pixmap.fill(Qt.transparent)
+        width = max(self.width(), 1)
+        minimum, maximum = self._recording.envelope(0, len(self._recording), width)
+        scale = np.nanmax(np.abs(np.concatenate((minimum, maximum)))) if np.any(np.isfinite(minimum)) else 1.0
+        scale = scale or 1.0
+        to_y = lambda v: (0.5 - 0.5 * np.nan_to_num(v) / scale) * (self.height() - 1)
+        painter = QPainter(pixmap)
+        for channel, colour in enumerate(GlPlot.COLOURS):
+            painter.setPen(QColor(colour))
+            for x, (low, high) in enumerate(zip(to_y(minimum[:, channel]), to_y(maximum[:, channel]))):
+                painter.drawLine(QPointF(x, low), QPointF(x, high))
+        painter.end()
+        return pixmap